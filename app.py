@@ -1,29 +1,37 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash, g, session, jsonify, Response, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, g, session, jsonify, Response, send_file, stream_with_context
 import sqlite3
 from pathlib import Path
 import os
 import threading
-import requests
+import json
+import time
+import uuid
+import atexit
+import hashlib
+import functools
+import socket
+from collections import OrderedDict
+from contextlib import contextmanager
+import bisect
+import re
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import zipfile
 import csv
 import io
 import base64
-from datetime import datetime, date, timedelta
+import zlib
+from datetime import datetime, date, timedelta, timezone
 from io import BytesIO
 import urllib.parse
-import qrcode
+import click
+from markupsafe import Markup
 
-ADMIN_WHATSAPP = os.getenv("ADMIN_WHATSAPP", "919659796217")
-
-# Email (Brevo)
-from sib_api_v3_sdk import Configuration, TransactionalEmailsApi, ApiClient, SendSmtpEmail
+# Heavy libraries (requests, qrcode/PIL, sib_api_v3_sdk, reportlab, apscheduler)
+# are imported on first use to keep worker boot and test imports fast.
 
-# PDF generation
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-
-# scheduler for daily report
-from apscheduler.schedulers.background import BackgroundScheduler
+ADMIN_WHATSAPP = os.getenv("ADMIN_WHATSAPP", "919659796217")
 
 # ---------------- App + DB ----------------
 BASE = Path(__file__).resolve().parent
@@ -40,18 +48,303 @@ SITE_URL = os.getenv("SITE_URL")
 ADMIN_USER = os.getenv("ADMIN_USER", "admin")
 ADMIN_PASS = os.getenv("ADMIN_PASS", "admin123")
 
+# ---------------- Metrics (Prometheus text format, per process) ----------------
+METRIC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS = []
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """
+    Minimal thread-safe Prometheus histogram (no client library needed).
+    """
+
+    def __init__(self, name, help_text, label_names, buckets=METRIC_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for le, c in zip(self.buckets, counts):
+                cumulative += c
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "Flask route latency", ("route", "method", "status"))
+SQL_SECONDS = Histogram("sql_statement_duration_seconds", "SQLite execute() time", ("op", "table"))
+PROVIDER_SECONDS = Histogram("provider_call_duration_seconds", "Outbound provider calls", ("provider", "outcome"))
+RENDER_SECONDS = Histogram("render_duration_seconds", "CPU-bound rendering (reportlab / qrcode / JSON)", ("kind",))
+
+@contextmanager
+def observe_time(histogram, *labels):
+    """
+    Time a block into `histogram`; an `outcome` label (ok/error) is appended
+    when the histogram declares one.
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        if "outcome" in histogram.label_names:
+            labels = labels + (outcome,)
+        histogram.observe(time.perf_counter() - started, *labels)
+
+def timed(histogram, *labels):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe_time(histogram, *labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+_SQL_TABLE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE|INDEX|TRIGGER)\s+(?:IF\s+NOT\s+EXISTS\s+)?([A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE,
+)
+
+@functools.lru_cache(maxsize=512)
+def sql_labels(sql):
+    """
+    (op, table) for a statement — keeps label cardinality bounded.
+    """
+    words = sql.split(None, 1)
+    op = words[0].upper() if words else "?"
+    match = _SQL_TABLE.search(sql)
+    return op, match.group(1) if match else "-"
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        HTTP_SECONDS.observe(time.perf_counter() - started, route, request.method, str(response.status_code))
+    return response
+
+# ---------------- Response compression (negotiated gzip / brotli) ----------------
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv"}
+
+@functools.lru_cache(maxsize=None)
+def brotli_module():
+    """
+    brotli (or brotlicffi) if installed; br is only offered when one is available.
+    """
+    for name in ("brotli", "brotlicffi"):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+def accepted_encoding():
+    """
+    Best Content-Encoding the client accepts: br, gzip or None.
+    """
+    offers = (["br"] if brotli_module() else []) + ["gzip"]
+    return request.accept_encodings.best_match(offers)
+
+def compress_body(data, encoding):
+    if encoding == "br":
+        return brotli_module().compress(data, quality=BROTLI_QUALITY)
+    gz = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    return gz.compress(data) + gz.flush()
+
+def encode_chunks(chunks, encoding):
+    """
+    Streamed form of compress_body.
+    """
+    if encoding == "br":
+        br = brotli_module().Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = br.process(chunk)
+            if data:
+                yield data
+        yield br.finish()
+        return
+    gz = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = gz.compress(chunk)
+        if data:
+            yield data
+    yield gz.flush()
+
+@app.after_request
+def compress_response(response):
+    """
+    Compress buffered API responses; streamed bodies (exports) are encoded by their route.
+    The ETag gets an -<encoding> suffix so each representation validates on its own.
+    """
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.status_code != 200
+            or response.is_streamed or response.direct_passthrough
+            or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = accepted_encoding()
+    if not encoding or response.content_length is None or response.content_length < COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(compress_body(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
 # ---------------- Database Helpers ----------------
+# SQLite tuning (WAL lets /book writers and admin readers run concurrently)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -16000))        # negative = KiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 64 * 1024 * 1024))
+SQLITE_REUSE_CONNECTIONS = os.getenv("SQLITE_REUSE_CONNECTIONS", "1") == "1"
+# Cold storage for old bookings: a separate SQLite file when ARCHIVE_DATABASE is set,
+# otherwise a bookings_archive table in the main DB
+ARCHIVE_DATABASE = os.getenv("ARCHIVE_DATABASE")
+ARCHIVE_TABLE = "archive.bookings_archive" if ARCHIVE_DATABASE else "main.bookings_archive"
+# commits slower than this were most likely waiting on another writer
+SQLITE_SLOW_COMMIT_MS = float(os.getenv("SQLITE_SLOW_COMMIT_MS", 250))
+
+class BookingsConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that reports write contention to the app log.
+    """
+
+    # (PRAGMA data_version, bookings version) seen by this connection, see bookings_version()
+    version_cache = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            SQL_SECONDS.observe(time.perf_counter() - started, *sql_labels(sql))
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            SQL_SECONDS.observe(time.perf_counter() - started, *sql_labels(sql))
+
+    def commit(self):
+        # data_version ignores this connection's own writes, so forget the cached version
+        self.version_cache = None
+        started = time.perf_counter()
+        try:
+            super().commit()
+        except sqlite3.OperationalError as e:
+            log_db_contention(e)
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        if waited_ms > SQLITE_SLOW_COMMIT_MS:
+            app.logger.warning("DB contention: commit took %.0f ms", waited_ms)
+
+def log_db_contention(error):
+    if "locked" in str(error) or "busy" in str(error):
+        app.logger.warning("DB contention (%s, busy_timeout=%sms) pid=%s thread=%s",
+                           error, SQLITE_BUSY_TIMEOUT_MS, os.getpid(), threading.current_thread().name)
+
+def connect_db():
+    db = sqlite3.connect(
+        app.config["DATABASE"],
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        factory=BookingsConnection,
+    )
+    db.row_factory = sqlite3.Row
+    db.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if SQLITE_JOURNAL_MODE:
+        db.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    db.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    db.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    db.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    if ARCHIVE_DATABASE:
+        db.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DATABASE,))
+        if SQLITE_JOURNAL_MODE:
+            db.execute(f"PRAGMA archive.journal_mode={SQLITE_JOURNAL_MODE}")
+    return db
+
+_thread_local = threading.local()
+
+def thread_db():
+    """
+    Connection reused by the current thread (per process and database path),
+    so request handlers and outbox workers skip the connect + PRAGMA cost.
+    """
+    conns = getattr(_thread_local, "conns", None)
+    if conns is None:
+        conns = _thread_local.conns = {}
+    key = (os.getpid(), app.config["DATABASE"])
+    db = conns.get(key)
+    if db is None:
+        db = conns[key] = connect_db()
+    return db
+
 def get_db():
     if "db" not in g:
-        g.db = sqlite3.connect(app.config["DATABASE"], detect_types=sqlite3.PARSE_DECLTYPES)
-        g.db.row_factory = sqlite3.Row
+        g.db = thread_db() if SQLITE_REUSE_CONNECTIONS else connect_db()
     return g.db
 
 @app.teardown_appcontext
 def close_db(exception=None):
     db = g.pop("db", None)
     if db:
-        db.close()
+        if not SQLITE_REUSE_CONNECTIONS:
+            db.close()
+        elif db.in_transaction:
+            # never leak a half-finished transaction into the next request
+            db.rollback()
+
+@app.errorhandler(sqlite3.OperationalError)
+def db_operational_error(e):
+    log_db_contention(e)
+    if "locked" in str(e) or "busy" in str(e):
+        return Response("Server busy, please retry.", status=503, headers={"Retry-After": "1"})
+    app.logger.exception("Database error: %s", e)
+    return Response("Database error", status=500)
 
 def create_tables():
     db = get_db()
@@ -68,20 +361,459 @@ def create_tables():
             extras TEXT,
             notes TEXT,
             status TEXT DEFAULT 'Pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            idempotency_key TEXT
         )
         """
     )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id INTEGER,
+            channel TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            claimed_by TEXT,
+            claimed_at REAL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox(status, next_attempt_at)")
+    db.execute("CREATE TABLE IF NOT EXISTS bulk_load (id INTEGER PRIMARY KEY)")
+    db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            customer_email TEXT,
+            phone TEXT NOT NULL,
+            event_date TEXT NOT NULL,
+            service TEXT,
+            extras TEXT,
+            notes TEXT,
+            status TEXT DEFAULT 'Pending',
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    archive_schema, archive_name = ARCHIVE_TABLE.split(".")
+    db.execute(f"CREATE INDEX IF NOT EXISTS {archive_schema}.idx_archive_event_date ON {archive_name}(event_date)")
+    db.execute(f"CREATE INDEX IF NOT EXISTS {archive_schema}.idx_archive_created ON {archive_name}(created_at, id)")
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_lease (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            run_key TEXT NOT NULL,
+            holder TEXT NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP,
+            duration_ms REAL,
+            status TEXT NOT NULL DEFAULT 'running',
+            error TEXT,
+            UNIQUE (job, run_key)
+        )
+        """
+    )
+    db.commit()
+    create_indexes(db)
+    create_stats_rollup(db)
+    create_search_index(db)
+    create_change_log(db)
+    create_version_counter(db)
+
+# Composite indexes backing /api/bookings keyset pagination + filters
+BOOKING_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_bookings_created ON bookings(created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_status_created ON bookings(status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_service_created ON bookings(service, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_location_created ON bookings(location COLLATE NOCASE, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_bookings_event_date ON bookings(event_date, created_at, id)",
+    # occupancy per (event_date, service) for capacity checks / availability, index only
+    "CREATE INDEX IF NOT EXISTS idx_bookings_occupancy ON bookings(event_date, service, status)",
+    # one booking per submission (see booking_idempotency_keys)
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_idempotency ON bookings(idempotency_key) "
+    "WHERE idempotency_key IS NOT NULL",
+]
+
+def create_indexes(db):
+    for stmt in BOOKING_INDEXES:
+        try:
+            db.execute(stmt)
+        except sqlite3.OperationalError as e:
+            # old DBs may still miss the status column until auto_fix_db runs
+            app.logger.info("Index skipped (%s): %s", e, stmt)
     db.commit()
 
-with app.app_context():
-    create_tables()
+# While bulk_load has a row (only inside an import / archive transaction) the
+# per-row INSERT triggers are skipped — bulk_insert_bookings() does the same
+# work set-based — and archived rows keep counting in booking_stats.
+NOT_BULK_LOADING = "NOT EXISTS (SELECT 1 FROM bulk_load)"
+
+# Rollup of booking counts per (created day, status, service, event month),
+# kept current by triggers so the dashboard never has to scan bookings.
+STATS_KEY_NEW = "date(NEW.created_at), COALESCE(NEW.status, 'Pending'), COALESCE(NEW.service, ''), substr(NEW.event_date, 1, 7)"
+STATS_MATCH_OLD = ("day = date(OLD.created_at) AND status = COALESCE(OLD.status, 'Pending') "
+                   "AND service = COALESCE(OLD.service, '') AND event_month = substr(OLD.event_date, 1, 7)")
+STATS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_insert AFTER INSERT ON bookings
+    WHEN {NOT_BULK_LOADING} BEGIN
+        INSERT INTO booking_stats (day, status, service, event_month, cnt) VALUES ({STATS_KEY_NEW}, 1)
+        ON CONFLICT(day, status, service, event_month) DO UPDATE SET cnt = cnt + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_delete AFTER DELETE ON bookings
+    WHEN {NOT_BULK_LOADING} BEGIN
+        UPDATE booking_stats SET cnt = cnt - 1 WHERE {STATS_MATCH_OLD};
+        DELETE FROM booking_stats WHERE {STATS_MATCH_OLD} AND cnt <= 0;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_update
+    AFTER UPDATE OF status, service, event_date, created_at ON bookings BEGIN
+        UPDATE booking_stats SET cnt = cnt - 1 WHERE {STATS_MATCH_OLD};
+        DELETE FROM booking_stats WHERE {STATS_MATCH_OLD} AND cnt <= 0;
+        INSERT INTO booking_stats (day, status, service, event_month, cnt) VALUES ({STATS_KEY_NEW}, 1)
+        ON CONFLICT(day, status, service, event_month) DO UPDATE SET cnt = cnt + 1;
+    END
+    """,
+]
+
+def create_stats_rollup(db):
+    exists = db.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='booking_stats'").fetchone()
+    try:
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS booking_stats (
+                day TEXT NOT NULL,
+                status TEXT NOT NULL,
+                service TEXT NOT NULL,
+                event_month TEXT NOT NULL,
+                cnt INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, status, service, event_month)
+            ) WITHOUT ROWID
+            """
+        )
+        if not exists:
+            # one-off backfill for databases that predate the rollup
+            db.execute(
+                """
+                INSERT INTO booking_stats (day, status, service, event_month, cnt)
+                SELECT date(created_at), COALESCE(status, 'Pending'), COALESCE(service, ''),
+                       substr(event_date, 1, 7), COUNT(*)
+                FROM bookings GROUP BY 1, 2, 3, 4
+                """
+            )
+        for stmt in STATS_TRIGGERS:
+            db.execute(stmt)
+        db.commit()
+    except sqlite3.OperationalError as e:
+        db.rollback()
+        app.logger.info("Stats rollup skipped (%s) — run auto_fix_db", e)
+
+# FTS5 index over the searchable booking columns (external content = bookings)
+SEARCH_COLUMNS = ["name", "phone", "location", "service", "extras", "notes"]
+SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_insert AFTER INSERT ON bookings
+    WHEN {NOT_BULK_LOADING} BEGIN
+        INSERT INTO bookings_fts (rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (NEW.id, {", ".join("NEW." + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_delete AFTER DELETE ON bookings BEGIN
+        INSERT INTO bookings_fts (bookings_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_fts_update AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON bookings BEGIN
+        INSERT INTO bookings_fts (bookings_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', OLD.id, {", ".join("OLD." + c for c in SEARCH_COLUMNS)});
+        INSERT INTO bookings_fts (rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (NEW.id, {", ".join("NEW." + c for c in SEARCH_COLUMNS)});
+    END
+    """,
+]
+
+def create_search_index(db):
+    exists = db.execute("SELECT 1 FROM sqlite_master WHERE name='bookings_fts'").fetchone()
+    try:
+        db.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5(
+                {", ".join(SEARCH_COLUMNS)},
+                content='bookings', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+            )
+            """
+        )
+        if not exists:
+            db.execute("INSERT INTO bookings_fts (bookings_fts) VALUES ('rebuild')")
+        for stmt in SEARCH_TRIGGERS:
+            db.execute(stmt)
+        db.commit()
+    except sqlite3.OperationalError as e:
+        db.rollback()
+        app.logger.warning("Full-text search disabled (%s)", e)
+
+# Append-only change feed for the live dashboard (/api/bookings/changes)
+CHANGE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_changes_insert AFTER INSERT ON bookings
+    WHEN {NOT_BULK_LOADING} BEGIN
+        INSERT INTO booking_changes (booking_id, op, status) VALUES (NEW.id, 'insert', NEW.status);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_changes_status AFTER UPDATE OF status ON bookings
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        INSERT INTO booking_changes (booking_id, op, status) VALUES (NEW.id, 'status', NEW.status);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_changes_delete AFTER DELETE ON bookings BEGIN
+        INSERT INTO booking_changes (booking_id, op, status) VALUES (OLD.id, 'delete', OLD.status);
+    END
+    """,
+]
+
+def create_change_log(db):
+    try:
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS booking_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                booking_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                status TEXT,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_changes_changed_at ON booking_changes(changed_at)")
+        for stmt in CHANGE_TRIGGERS:
+            db.execute(stmt)
+        db.commit()
+    except sqlite3.OperationalError as e:
+        db.rollback()
+        app.logger.info("Change log skipped (%s) — run auto_fix_db", e)
+
+# Version counter bumped on any bookings write (and by purge_archive); used for ETags on list/export endpoints
+VERSION_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_version_{op.lower()} AFTER {op} ON bookings
+    {"WHEN " + NOT_BULK_LOADING if op == "INSERT" else ""} BEGIN
+        UPDATE db_version SET version = version + 1 WHERE id = 1;
+    END
+    """
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
+
+def create_version_counter(db):
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS db_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    # random epoch so a restored / recreated DB never reuses old ETags
+    db.execute("INSERT OR IGNORE INTO db_version (id, epoch, version) VALUES (1, ?, 0)", (uuid.uuid4().hex[:8],))
+    for stmt in VERSION_TRIGGERS:
+        db.execute(stmt)
+    db.commit()
+
+_initialized_dbs = set()
+_init_lock = threading.Lock()
+
+def init_db():
+    """
+    Explicit schema setup + migrations (tables, indexes, triggers, status column).
+    Run by create_app(), `flask --app app init-db` and `python app.py`.
+    """
+    with app.app_context():
+        create_tables()
+        auto_fix_db()
+    _initialized_dbs.add(app.config["DATABASE"])
+
+@app.cli.command("init-db")
+def init_db_command():
+    init_db()
+    print("Database ready:", app.config["DATABASE"])
+
+@app.before_request
+def ensure_db_initialized():
+    # safety net for `gunicorn app:app`, which skips create_app(): the first request
+    # sets up the schema and starts the scheduler + outbox (pending rows left by a restart)
+    if app.config["DATABASE"] in _initialized_dbs:
+        return
+    with _init_lock:
+        if app.config["DATABASE"] not in _initialized_dbs:
+            init_db()
+            start_background()
+
+# ---------------- Booking list helpers (filters + keyset cursor) ----------------
+BOOKING_FIELDS = ["id", "name", "phone", "location", "event_date", "service",
+                  "extras", "notes", "customer_email", "status", "created_at"]
+# BOOKING_FIELDS as a select list, so rows come back in field order without dicts
+BOOKING_SELECT = ", ".join("COALESCE(status, 'Pending') AS status" if f == "status" else f for f in BOOKING_FIELDS)
+_ID = BOOKING_FIELDS.index("id")
+_CREATED_AT = BOOKING_FIELDS.index("created_at")
+BOOKINGS_PAGE_SIZE = int(os.getenv("BOOKINGS_PAGE_SIZE", 100))
+BOOKINGS_MAX_PAGE_SIZE = int(os.getenv("BOOKINGS_MAX_PAGE_SIZE", 500))
+
+def booking_filters(args):
+    """
+    Build a WHERE clause from request args shared by the booking list endpoints.
+    Supported: status, service, location, date_from / date_to (event_date, YYYY-MM-DD).
+    """
+    clauses, params = [], []
+    if args.get("status"):
+        clauses.append("status = ?")
+        params.append(args["status"])
+    if args.get("service"):
+        clauses.append("service = ?")
+        params.append(args["service"])
+    if args.get("location"):
+        clauses.append("location = ? COLLATE NOCASE")
+        params.append(args["location"].strip())
+    if args.get("date_from"):
+        clauses.append("event_date >= ?")
+        params.append(args["date_from"])
+    if args.get("date_to"):
+        clauses.append("event_date <= ?")
+        params.append(args["date_to"])
+    return clauses, params
+
+def encode_cursor(created_at, booking_id):
+    raw = f"{created_at}|{booking_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+class InvalidCursor(ValueError):
+    """
+    Malformed ?cursor=; the only ValueError api_bookings turns into a 400.
+    """
+
+def decode_cursor(cursor):
+    """
+    Return (created_at, id) from an opaque cursor, or None if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, booking_id = raw.rsplit("|", 1)
+        return created_at, int(booking_id)
+    except Exception:
+        return None
+
+def fts_query(q):
+    """
+    Turn free text into an FTS5 MATCH expression: every term is quoted and
+    prefix-matched; digit-only input is treated as one phone-number prefix.
+    """
+    q = (q or "").strip()
+    digits = "".join(ch for ch in q if ch.isdigit())
+    if digits and all(ch.isdigit() or ch in " +-()" for ch in q):
+        if q.startswith("+91") and len(digits) > 2:
+            digits = digits[2:]  # phones are stored without the country code
+        return f'phone : "{digits}"*'
+    terms = [t.replace('"', '""') for t in q.split() if t.replace('"', "")]
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+def bookings_version(db):
+    """
+    Cheap token that changes whenever bookings change. PRAGMA data_version
+    tells us if any other connection committed since our last look; only
+    then is db_version read again.
+    """
+    data_version = db.execute("PRAGMA data_version").fetchone()[0]
+    cached = db.version_cache
+    if cached and cached[0] == data_version:
+        return cached[1]
+    row = db.execute("SELECT epoch, version FROM db_version WHERE id=1").fetchone()
+    token = f"{row['epoch']}-{row['version']}"
+    db.version_cache = (data_version, token)
+    return token
+
+# Small in-process cache of serialized responses keyed by (bookings version, URL)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 32))
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def cached_response_body(key, build):
+    with _response_cache_lock:
+        body = _response_cache.get(key)
+        if body is not None:
+            _response_cache.move_to_end(key)
+            return body
+    body = build()
+    with _response_cache_lock:
+        _response_cache[key] = body
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return body
+
+def not_modified(etag):
+    """
+    304 response if the request's If-None-Match matches, else None.
+    """
+    for candidate in (etag, f"{etag}-gzip", f"{etag}-br"):
+        if request.if_none_match.contains(candidate):
+            return Response(status=304, headers={"ETag": f'"{candidate}"', "Cache-Control": "private, no-cache",
+                                                 "Vary": "Accept-Encoding"})
+    return None
+
+BOOKING_COLUMNS = "id, name, location, customer_email, phone, event_date, service, extras, notes, status, created_at"
+
+def bookings_source(include_archive=False):
+    """
+    FROM target for booking lists: the hot table, or hot + archive on request.
+    """
+    if not include_archive:
+        return "bookings"
+    return f"(SELECT {BOOKING_COLUMNS} FROM bookings UNION ALL SELECT {BOOKING_COLUMNS} FROM {ARCHIVE_TABLE})"
+
+def wants_archive(args):
+    return args.get("include_archive") == "1"
+
+def booking_to_dict(r):
+    keys = r.keys()
+    d = {k: r[k] for k in BOOKING_FIELDS if k in keys}
+    # safe access to status (backwards compatible)
+    d.setdefault("status", "Pending")
+    return d
 
 # ---------------- Utilities: PDF receipt ----------------
+@timed(RENDER_SECONDS, "pdf")
 def generate_pdf_receipt(booking_row):
     """
     Return bytes of a simple PDF receipt using reportlab
     """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
@@ -104,6 +836,8 @@ def generate_pdf_receipt(booking_row):
     y -= 16
     p.drawString(x, y, f"Service: {booking_row['service']}")
     y -= 16
+    p.drawString(x, y, f"Status: {booking_row['status'] or 'Pending'}")
+    y -= 16
     p.drawString(x, y, "Extras:")
     y -= 14
     p.setFont("Helvetica", 10)
@@ -123,7 +857,284 @@ def generate_pdf_receipt(booking_row):
     buffer.seek(0)
     return buffer.read()
 
+# ---------------- Disk LRU (receipt cache, QR disk tier) ----------------
+class DiskLRU:
+    """
+    Size-bounded directory of cache files; the least recently used (oldest mtime) go first.
+    A running byte total makes a write O(1). Other processes write too, so the directory
+    is re-scanned when the total crosses max_bytes or is older than rescan_seconds.
+    """
+
+    def __init__(self, directory, suffix, max_bytes, rescan_seconds=300):
+        self.directory = Path(directory)
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self._lock = threading.Lock()       # running total only
+        self._scan_lock = threading.Lock()  # one scan at a time, readers never wait on it
+        self._bytes = None
+        self._scanned_at = 0.0
+
+    def path(self, key):
+        return self.directory / f"{key}{self.suffix}"
+
+    def read(self, key):
+        """
+        Cached bytes for key (marked as just used), or None.
+        """
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # LRU: mtime == last use
+        except FileNotFoundError:
+            pass
+        return data
+
+    def write(self, key, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            stale = time.monotonic() - self._scanned_at > self.rescan_seconds
+            if self._bytes is not None and not stale:
+                self._bytes += len(data)
+                if self._bytes <= self.max_bytes:
+                    return
+        self.evict()
+
+    def evict(self):
+        """
+        Drop least recently used files until the directory fits max_bytes, going down
+        to 90% of it so the next writes do not trigger another scan at once.
+        """
+        if not self._scan_lock.acquire(blocking=False):
+            return  # another thread is already scanning
+        try:
+            scanned_at = time.monotonic()
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= self.max_bytes * 0.9:
+                        break
+            with self._lock:
+                self._bytes = total
+                self._scanned_at = scanned_at
+        finally:
+            self._scan_lock.release()
+
+# ---------------- Receipt cache (content-addressed, LRU on disk) ----------------
+RECEIPT_CACHE_DIR = Path(os.getenv("RECEIPT_CACHE_DIR", BASE / "instance" / "receipts"))
+RECEIPT_CACHE_MAX_BYTES = int(os.getenv("RECEIPT_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+RECEIPT_CACHE_RESCAN_SECONDS = float(os.getenv("RECEIPT_CACHE_RESCAN_SECONDS", 300))
+# bump when the receipt layout changes so old files stop matching
+RECEIPT_LAYOUT_VERSION = 2
+RECEIPT_FIELDS = ["id", "name", "phone", "customer_email", "event_date", "service", "extras", "notes", "status"]
+
+receipt_cache = DiskLRU(RECEIPT_CACHE_DIR, ".pdf", RECEIPT_CACHE_MAX_BYTES, RECEIPT_CACHE_RESCAN_SECONDS)
+
+def receipt_key(booking_row):
+    """
+    sha256 of everything drawn on the receipt; any field or status change gives a new key.
+    """
+    values = [RECEIPT_LAYOUT_VERSION] + [booking_row[k] for k in RECEIPT_FIELDS]
+    return hashlib.sha256(json.dumps(values, default=str).encode("utf-8")).hexdigest()
+
+def get_receipt_pdf(booking_row):
+    """
+    Return (pdf_bytes, key), rendering with generate_pdf_receipt only on a cache miss.
+    """
+    key = receipt_key(booking_row)
+    pdf_bytes = receipt_cache.read(key)
+    if pdf_bytes is None:
+        pdf_bytes = generate_pdf_receipt(booking_row)
+        receipt_cache.write(key, pdf_bytes)
+    return pdf_bytes, key
+
+# ---------------- Batch receipt export (ZIP, rendered in a process pool) ----------------
+# 0 renders in the web/CLI process instead (e.g. where spawning processes is not allowed)
+RECEIPT_ZIP_PROCESSES = int(os.getenv("RECEIPT_ZIP_PROCESSES", min(4, os.cpu_count() or 1)))
+# receipts submitted ahead of the one being written; bounds memory for any batch size
+RECEIPT_ZIP_WINDOW = int(os.getenv("RECEIPT_ZIP_WINDOW", max(1, RECEIPT_ZIP_PROCESSES) * 4))
+
+_receipt_pool = None
+_receipt_pool_lock = threading.Lock()
+
+def receipt_pool(workers=RECEIPT_ZIP_PROCESSES):
+    """
+    Shared process pool for reportlab rendering (CPU bound, so threads would
+    serialize on the GIL). Spawned rather than forked: the parent has live
+    threads and SQLite connections.
+    """
+    global _receipt_pool
+    with _receipt_pool_lock:
+        if _receipt_pool is None:
+            _receipt_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _receipt_pool
+
+def close_receipt_pool():
+    global _receipt_pool
+    with _receipt_pool_lock:
+        if _receipt_pool is not None:
+            _receipt_pool.shutdown(wait=False, cancel_futures=True)
+            _receipt_pool = None
+
+def render_receipt(booking):
+    """
+    Process pool entry point: receipt bytes for a booking dict (disk cache shared).
+    """
+    pdf_bytes, _ = get_receipt_pdf(booking)
+    return pdf_bytes
+
+class _ZipSink:
+    """
+    Write-only file object for zipfile; drained after every entry. No tell(),
+    so zipfile writes data descriptors and never seeks back.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def filename_date(value):
+    """
+    Digits and dashes of a date, for use in file and ZIP entry names (no path tricks).
+    """
+    return re.sub(r"[^0-9-]", "", str(value or ""))[:10]
+
+def receipt_zip_chunks(bookings, processes=None):
+    """
+    Yield a ZIP of booking_<id>.pdf receipts while they are still being rendered.
+    `bookings` is an iterable of booking dicts; at most RECEIPT_ZIP_WINDOW
+    receipts are in flight or buffered at any time.
+    """
+    processes = RECEIPT_ZIP_PROCESSES if processes is None else processes
+    pool = receipt_pool(processes) if processes > 0 else None
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    pending = []
+
+    def write_entry(booking, pdf_bytes):
+        # older bookings may carry free-text event_date (no zip-slip)
+        day = filename_date(booking["event_date"])
+        name = f"{day}_booking_{booking['id']}.pdf" if day else f"booking_{int(booking['id'])}.pdf"
+        zf.writestr(name, pdf_bytes)
+        return sink.drain()
+
+    try:
+        for booking in bookings:
+            if pool is None:
+                yield write_entry(booking, render_receipt(booking))
+                continue
+            pending.append((booking, pool.submit(render_receipt, booking)))
+            if len(pending) >= RECEIPT_ZIP_WINDOW:
+                done, fut = pending.pop(0)
+                yield write_entry(done, fut.result())
+        while pending:
+            done, fut = pending.pop(0)
+            yield write_entry(done, fut.result())
+        zf.close()
+        yield sink.drain()
+    finally:
+        # client went away mid-download: drop the queued renders
+        for _, fut in pending:
+            fut.cancel()
+
+# ---------------- Provider HTTP clients (pooled, keep-alive) ----------------
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+SMS_TIMEOUT = float(os.getenv("SMS_TIMEOUT", 15))
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", 10))
+BREVO_TIMEOUT = float(os.getenv("BREVO_TIMEOUT", 15))
+
+_clients_lock = threading.Lock()
+_http_session = None
+_brevo_clients = {}
+
+def http_session():
+    """
+    Process-wide requests.Session for Fast2SMS / Telegram, created on first use.
+    Keeps TCP+TLS connections alive between notifications.
+    """
+    global _http_session
+    if _http_session is None:
+        with _clients_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+def brevo_api(api_key):
+    """
+    Cached TransactionalEmailsApi per API key; its ApiClient owns a urllib3 pool.
+    """
+    api = _brevo_clients.get(api_key)
+    if api is None:
+        with _clients_lock:
+            api = _brevo_clients.get(api_key)
+            if api is None:
+                from sib_api_v3_sdk import Configuration, TransactionalEmailsApi, ApiClient
+                configuration = Configuration()
+                configuration.api_key["api-key"] = api_key
+                configuration.connection_pool_maxsize = HTTP_POOL_SIZE
+                api = TransactionalEmailsApi(ApiClient(configuration))
+                _brevo_clients[api_key] = api
+    return api
+
+def close_provider_clients():
+    global _http_session
+    with _clients_lock:
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+        for api in _brevo_clients.values():
+            try:
+                api.api_client.rest_client.pool_manager.clear()
+            except Exception:
+                pass
+        _brevo_clients.clear()
+
+atexit.register(close_provider_clients)
+
 # ---------------- SMS (Fast2SMS) ----------------
+@timed(PROVIDER_SECONDS, "fast2sms")
 def send_sms_fast2sms(phone, message):
     api_key = os.getenv("FAST2SMS_API_KEY")
     if not api_key:
@@ -139,19 +1150,23 @@ def send_sms_fast2sms(phone, message):
     }
     headers = {"authorization": api_key}
     try:
-        res = requests.post(url, data=payload, headers=headers, timeout=15)
+        res = http_session().post(url, data=payload, headers=headers, timeout=SMS_TIMEOUT)
+        res.raise_for_status()
         app.logger.info("SMS SENT ✓ %s", res.text)
     except Exception as e:
-        app.logger.exception("SMS ERROR: %s", e)
+        app.logger.error("SMS ERROR: %s", e)
+        raise
 
 # ---------------- EMAIL (BREVO API) with PDF attachment & Tamil ----------------
+@timed(PROVIDER_SECONDS, "brevo")
 def send_email_via_brevo(
         name, location, phone, event_date, service,
         extras, notes, customer_email=None,
-        status="Pending", booking_id=None
+        status="Pending", booking_id=None, notify_admin=True
     ):
     """
     Send booking email using BREVO to both ADMIN and Customer (if available).
+    notify_admin=False skips the admin copy (bulk actions send the admin one summary instead).
     Includes Tamil translation + PDF receipt (when booking_id is provided).
     Safe URL building: uses SITE_URL env if provided; otherwise tries url_for inside app context; falls back to localhost.
     """
@@ -173,14 +1188,14 @@ def send_email_via_brevo(
         app.logger.info("Brevo Missing API or Admin email.")
         return
 
-    configuration = Configuration()
-    configuration.api_key["api-key"] = api_key
-    api_instance = TransactionalEmailsApi(ApiClient(configuration))
+    api_instance = brevo_api(api_key)
 
     # Send to admin + customer
-    to_list = [{"email": admin_email}]
+    to_list = [{"email": admin_email}] if notify_admin else []
     if customer_email and customer_email.strip():
         to_list.append({"email": customer_email.strip()})
+    if not to_list:
+        return
 
     # Status text
     status_text = {
@@ -234,23 +1249,26 @@ def send_email_via_brevo(
     </body></html>
     """
 
-    # PDF ATTACHMENT HANDLING
+    # PDF ATTACHMENT HANDLING (built from the arguments, served from the receipt cache)
     attachments = None
     if booking_id:
         try:
-            db = get_db()
-            row = db.execute("SELECT * FROM bookings WHERE id=?", (booking_id,)).fetchone()
-            if row:
-                pdf_bytes = generate_pdf_receipt(row)
-                b64 = base64.b64encode(pdf_bytes).decode("utf-8")
-                attachments = [{
-                    "content": b64,
-                    "name": f"booking_{booking_id}.pdf"
-                }]
+            receipt_row = {
+                "id": booking_id, "name": name, "phone": phone, "customer_email": customer_email,
+                "event_date": event_date, "service": service, "extras": extras,
+                "notes": notes, "status": status,
+            }
+            pdf_bytes, _ = get_receipt_pdf(receipt_row)
+            b64 = base64.b64encode(pdf_bytes).decode("utf-8")
+            attachments = [{
+                "content": b64,
+                "name": f"booking_{booking_id}.pdf"
+            }]
         except Exception as e:
             app.logger.exception("PDF generation failed: %s", e)
 
     # SEND EMAIL
+    from sib_api_v3_sdk import SendSmtpEmail
     send_smtp_email = SendSmtpEmail(
         to=to_list,
         sender={"email": admin_email},
@@ -260,21 +1278,17 @@ def send_email_via_brevo(
     )
 
     try:
-        api_instance.send_transac_email(send_smtp_email)
+        api_instance.send_transac_email(send_smtp_email, _request_timeout=BREVO_TIMEOUT)
         app.logger.info("BREVO EMAIL SENT ✓ to Admin + Customer")
     except Exception as e:
-        app.logger.exception("BREVO ERROR: %s", e)
+        app.logger.error("BREVO ERROR: %s", e)
+        raise
 
 # ---------------- WHATSAPP (UltraMSG) with Template fallback ----------------
-def send_whatsapp_message(name, phone, event_date, service,
-                          extras, location, customer_email, notes):
+def whatsapp_links(name, phone, event_date, service, location):
     """
-    FREE WhatsApp handling using wa.me (Click-to-Chat)
-    - Generates customer + admin WhatsApp links
-    - Generates QR code
-    - No API / No payment
+    Build the wa.me click-to-chat message + links (no I/O).
     """
-
     message = (
         f"🌸 JAGADHA A to Z Event Management 🌸\n\n"
         f"Booking Update\n"
@@ -288,31 +1302,77 @@ def send_whatsapp_message(name, phone, event_date, service,
 
     encoded = urllib.parse.quote(message)
 
-    customer_link = f"https://wa.me/91{phone}?text={encoded}"
-    admin_link = f"https://wa.me/{ADMIN_WHATSAPP}?text={encoded}"
+    return {
+        "message": message,
+        "customer_link": f"https://wa.me/91{phone}?text={encoded}",
+        "admin_link": f"https://wa.me/{ADMIN_WHATSAPP}?text={encoded}",
+    }
 
-    # Generate QR (customer)
-    try:
-        qr = qrcode.make(customer_link)
-        qr_path = os.path.join(app.static_folder, "whatsapp_qr.png")
-        qr.save(qr_path)
-    except Exception as e:
-        app.logger.exception("QR generation failed: %s", e)
-        qr_path = None
+def send_whatsapp_message(name, phone, event_date, service,
+                          extras, location, customer_email, notes):
+    """
+    FREE WhatsApp handling using wa.me (Click-to-Chat)
+    - Generates customer + admin WhatsApp links
+    - No API / No payment
+    The QR code is served per booking from /booking/<id>/whatsapp_qr.png.
+    """
+    wa = whatsapp_links(name, phone, event_date, service, location)
 
     # Log only (cannot auto-send WhatsApp)
-    app.logger.info("WHATSAPP LINK (Customer): %s", customer_link)
-    app.logger.info("WHATSAPP LINK (Admin): %s", admin_link)
+    app.logger.info("WHATSAPP LINK (Customer): %s", wa["customer_link"])
+    app.logger.info("WHATSAPP LINK (Admin): %s", wa["admin_link"])
 
-    return {
-        "message": message,
-        "customer_link": customer_link,
-        "admin_link": admin_link,
-        "qr_path": qr_path
-    }
+    return wa
+
+# ---------------- WhatsApp QR cache (memory LRU + optional disk tier) ----------------
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", 256))
+# set QR_CACHE_DIR="" to keep QR codes in memory only
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", str(BASE / "instance" / "qr"))
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", 20 * 1024 * 1024))
+QR_CACHE_RESCAN_SECONDS = float(os.getenv("QR_CACHE_RESCAN_SECONDS", 300))
+
+_qr_cache = OrderedDict()
+_qr_lock = threading.Lock()
+qr_disk = DiskLRU(QR_CACHE_DIR, ".png", QR_CACHE_MAX_BYTES, QR_CACHE_RESCAN_SECONDS) if QR_CACHE_DIR else None
+
+def qr_version(link):
+    return hashlib.sha1(link.encode("utf-8")).hexdigest()[:16]
+
+def booking_qr_png(booking_id, link):
+    """
+    PNG bytes of the QR for a booking's customer link, generated once per (booking, link).
+    """
+    key = f"{booking_id}-{qr_version(link)}"
+    with _qr_lock:
+        png = _qr_cache.get(key)
+        if png is not None:
+            _qr_cache.move_to_end(key)
+            return png
+
+    png = qr_disk.read(key) if qr_disk is not None else None
+
+    if png is None:
+        import qrcode
+        buffer = BytesIO()
+        with observe_time(RENDER_SECONDS, "qr"):
+            qrcode.make(link).save(buffer)
+        png = buffer.getvalue()
+        if qr_disk is not None:
+            try:
+                qr_disk.write(key, png)
+            except OSError as e:
+                app.logger.warning("QR disk cache write failed: %s", e)
+
+    with _qr_lock:
+        _qr_cache[key] = png
+        _qr_cache.move_to_end(key)
+        while len(_qr_cache) > QR_CACHE_SIZE:
+            _qr_cache.popitem(last=False)
+    return png
 
 
 # ---------------- TELEGRAM ADMIN PUSH (for new bookings & daily report) ----------------
+@timed(PROVIDER_SECONDS, "telegram")
 def telegram_push(message):
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     chat_id = os.getenv("TELEGRAM_CHAT_ID")
@@ -322,39 +1382,1212 @@ def telegram_push(message):
     try:
         url = f"https://api.telegram.org/bot{token}/sendMessage"
         payload = {"chat_id": chat_id, "text": message}
-        r = requests.post(url, data=payload, timeout=10)
+        r = http_session().post(url, data=payload, timeout=TELEGRAM_TIMEOUT)
+        r.raise_for_status()
         app.logger.info("TELEGRAM PUSH %s", r.text)
     except Exception as e:
-        app.logger.exception("Telegram push error: %s", e)
+        app.logger.error("Telegram push error: %s", e)
+        raise
+
+# New-booking alerts are coalesced: the first alert after a quiet spell goes out at
+# once, later ones are held for TELEGRAM_DIGEST_WINDOW seconds (or until
+# TELEGRAM_DIGEST_MAX are waiting) and sent as one digest (NotificationOutbox._dispatch_digest).
+BOOKING_ALERT_CHANNEL = "booking_alert"
+TELEGRAM_DIGEST_WINDOW = float(os.getenv("TELEGRAM_DIGEST_WINDOW", 60))
+TELEGRAM_DIGEST_MAX = int(os.getenv("TELEGRAM_DIGEST_MAX", 20))
+TELEGRAM_MESSAGE_LIMIT = 4096
+# scheduler_lease row whose expires_at is the earliest time the next digest may go out
+DIGEST_LEASE = "telegram_digest"
+
+def telegram_digest_text(messages):
+    """
+    One Telegram message for a batch of alerts, trimmed to TELEGRAM_MESSAGE_LIMIT.
+    """
+    if len(messages) == 1:
+        return messages[0][:TELEGRAM_MESSAGE_LIMIT]
+    text = f"📩 {len(messages)} new bookings"
+    for i, message in enumerate(messages):
+        more = f"\n\n…and {len(messages) - i} more"
+        if len(text) + 2 + len(message) + len(more) > TELEGRAM_MESSAGE_LIMIT:
+            return text + more
+        text += "\n\n" + message
+    return text
 
 # ---------------- Admin daily summary (08:00) ----------------
 def daily_admin_report():
     try:
-        db = get_db()
-        today = date.today()
-        rows = db.execute("SELECT status, COUNT(*) as cnt FROM bookings WHERE date(created_at)=? GROUP BY status", (today.isoformat(),)).fetchall()
-        summary = {r["status"]: r["cnt"] for r in rows}
-        total = sum(summary.values())
-        msg = f"Daily Bookings Report ({today.isoformat()})\nTotal: {total}\n"
-        for k, v in summary.items():
-            msg += f"{k}: {v}\n"
-        # send to telegram and email admin
-        telegram_push(msg)
-        # email admin (use send_email_via_brevo)
-        send_email_via_brevo("Admin", "-", "-", today.isoformat(), "-", "-", msg, customer_email=None, status="Daily Report")
+        with app.app_context():
+            db = get_db()
+            today = date.today()
+            rows = db.execute("SELECT status, SUM(cnt) as cnt FROM booking_stats WHERE day=? GROUP BY status", (today.isoformat(),)).fetchall()
+            summary = {r["status"]: r["cnt"] for r in rows}
+            total = sum(summary.values())
+            msg = f"Daily Bookings Report ({today.isoformat()})\nTotal: {total}\n"
+            for k, v in summary.items():
+                msg += f"{k}: {v}\n"
+            # send to telegram and email admin (via outbox, retried on failure)
+            enqueue_notification(db, "telegram", {"message": msg})
+            enqueue_notification(db, "email", {
+                "name": "Admin", "location": "-", "phone": "-", "event_date": today.isoformat(),
+                "service": "-", "extras": "-", "notes": msg, "customer_email": None,
+                "status": "Daily Report",
+            })
+            db.commit()
+        outbox.wake()
     except Exception as e:
         app.logger.exception("daily_admin_report error: %s", e)
 
-# start scheduler
-scheduler = BackgroundScheduler()
-scheduler.add_job(daily_admin_report, 'cron', hour=8, minute=0)  # 08:00 server time
-scheduler.start()
+# ---------------- Notification outbox (durable, retried) ----------------
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 4))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 5))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 10))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", 3600))
+
+# per-provider attempt limits (first try included)
+OUTBOX_MAX_ATTEMPTS = {"email": 6, "telegram": 6, "sms": 4, "whatsapp": 2, BOOKING_ALERT_CHANNEL: 6}
+
+OUTBOX_HANDLERS = {
+    "email": lambda p: send_email_via_brevo(**p),
+    "sms": lambda p: send_sms_fast2sms(p["phone"], p["message"]),
+    "telegram": lambda p: telegram_push(p["message"]),
+    "whatsapp": lambda p: send_whatsapp_message(**p),
+}
+
+# Per-provider limits so one slow / failing provider cannot hold every worker
+# and bursts (bulk confirm, imports) stay inside provider quotas.
+# <CHANNEL>_RATE_PER_SEC / <CHANNEL>_RATE_BURST override the defaults below and are
+# deployment-wide: buckets and breakers live in each process, so every process gets
+# 1/OUTBOX_PROCESSES of the rate. OUTBOX_PROCESSES defaults to WEB_CONCURRENCY,
+# gunicorn's worker count setting; set it if workers are configured another way.
+OUTBOX_PROCESSES = max(1, int(os.getenv("OUTBOX_PROCESSES", os.getenv("WEB_CONCURRENCY", 1))))
+OUTBOX_CHANNEL_WORKERS = int(os.getenv("OUTBOX_CHANNEL_WORKERS", max(1, OUTBOX_WORKERS // 2)))
+OUTBOX_BREAKER_FAILURES = int(os.getenv("OUTBOX_BREAKER_FAILURES", 5))
+OUTBOX_BREAKER_COOLDOWN = float(os.getenv("OUTBOX_BREAKER_COOLDOWN", 60))
+PROVIDER_RATE_DEFAULTS = {"email": (10, 20), "sms": (2, 5), "telegram": (1, 3), "whatsapp": (20, 50)}
+
+class TokenBucket:
+    """
+    `rate` tokens per second, at most `burst` banked.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+        self._at = now
+
+    def take(self):
+        """
+        Take a token; returns 0 on success, else seconds until one is available.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def wait_time(self):
+        with self._lock:
+            self._refill()
+            return 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive errors; after `cooldown` seconds a single
+    probe is let through and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name, failures=OUTBOX_BREAKER_FAILURES, cooldown=OUTBOX_BREAKER_COOLDOWN):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self._errors = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        """
+        0 if a call may go out now, else seconds until the next probe.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            if self._probing:
+                return self.cooldown
+            return max(0, self._opened_at + self.cooldown - time.monotonic())
+
+    def begin(self):
+        with self._lock:
+            if self._opened_at is not None:
+                self._probing = True
+
+    def success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                app.logger.info("Circuit for %s closed", self.name)
+            self._errors = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self._errors += 1
+            if self._probing or self._errors >= self.failures:
+                if self._opened_at is None or self._probing:
+                    app.logger.warning("Circuit for %s open for %ss after %s errors",
+                                       self.name, self.cooldown, self._errors)
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+def provider_bucket(channel):
+    """
+    This process's share of the channel's deployment-wide rate limit.
+    """
+    rate, burst = PROVIDER_RATE_DEFAULTS.get(channel, (5, 10))
+    rate = float(os.getenv(f"{channel.upper()}_RATE_PER_SEC", rate)) / OUTBOX_PROCESSES
+    burst = float(os.getenv(f"{channel.upper()}_RATE_BURST", burst)) / OUTBOX_PROCESSES
+    # a bucket that can never hold a whole token would never send
+    return TokenBucket(rate, max(1.0, burst))
+
+def enqueue_notification(db, channel, payload, booking_id=None):
+    """
+    Queue a notification on the caller's connection. It is not committed here,
+    so it lands in the same transaction as the booking insert / status update.
+    Call outbox.wake() after the commit.
+    """
+    db.execute(
+        "INSERT INTO notification_outbox (booking_id, channel, payload, next_attempt_at) VALUES (?, ?, ?, ?)",
+        (booking_id, channel, json.dumps(payload), time.time()),
+    )
+
+def enqueue_notifications(db, items):
+    """
+    Batch form of enqueue_notification: items are (booking_id, channel, payload).
+    """
+    now = time.time()
+    db.executemany(
+        "INSERT INTO notification_outbox (booking_id, channel, payload, next_attempt_at) VALUES (?, ?, ?, ?)",
+        [(booking_id, channel, json.dumps(payload), now) for booking_id, channel, payload in items],
+    )
+
+def booking_notifications(row, status, sms_message=None, notify_admin=True):
+    """
+    Customer-facing notifications for a booking status change
+    (email with PDF receipt, WhatsApp link/QR, optional SMS) as outbox items.
+    """
+    items = []
+    if notify_admin or row["customer_email"]:
+        items.append((row["id"], "email", {
+            "name": row["name"], "location": row["location"], "phone": row["phone"],
+            "event_date": row["event_date"], "service": row["service"], "extras": row["extras"],
+            "notes": row["notes"], "customer_email": row["customer_email"],
+            "status": status, "booking_id": row["id"], "notify_admin": notify_admin,
+        }))
+    items.append((row["id"], "whatsapp", {
+        "name": row["name"], "phone": row["phone"], "event_date": row["event_date"],
+        "service": row["service"], "extras": row["extras"], "location": row["location"],
+        "customer_email": row["customer_email"], "notes": row["notes"],
+    }))
+    if sms_message:
+        items.append((row["id"], "sms", {"phone": row["phone"], "message": sms_message}))
+    return items
+
+def enqueue_booking_notifications(db, row, status, sms_message=None):
+    enqueue_notifications(db, booking_notifications(row, status, sms_message))
+
+class NotificationOutbox:
+    """
+    Drains notification_outbox with a bounded thread pool.
+    Rows are claimed with a lease so several gunicorn workers can share the table;
+    a row whose worker died is picked up again once the lease expires.
+    Each channel has its own worker cap, token bucket and circuit breaker: rows of a
+    throttled or broken channel stay pending (no attempt used) while the others flow.
+    booking_alert rows are not sent one by one but folded into Telegram digests.
+    """
+
+    def __init__(self, workers=OUTBOX_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._inflight = 0
+        self._channel_inflight = {}
+        self.buckets = {ch: provider_bucket(ch) for ch in OUTBOX_HANDLERS}
+        self.breakers = {ch: CircuitBreaker(ch) for ch in OUTBOX_HANDLERS}
+        self._pid = None
+        self._thread = None
+        self._pool = None
+
+    def start(self):
+        with self._lock:
+            # (re)start after a fork: threads do not survive into the child
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._inflight = 0
+            self._channel_inflight = {}
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="outbox")
+            self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def shutdown(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._pool:
+            self._pool.shutdown(wait=wait)
+
+    def _run(self):
+        while not self._stop.is_set():
+            claimed, next_due = 0, None
+            try:
+                claimed, next_due = self._dispatch()
+            except Exception:
+                app.logger.exception("Outbox dispatcher error")
+            if claimed:
+                continue
+            timeout = OUTBOX_POLL_SECONDS
+            if next_due is not None:
+                timeout = max(0.05, min(timeout, next_due - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _blocked_channels(self):
+        """
+        {channel: seconds until it may send again} for channels that cannot take work now
+        (None = until one of its in-flight sends finishes).
+        """
+        blocked = {}
+        with self._lock:
+            busy = {ch for ch, n in self._channel_inflight.items() if n >= OUTBOX_CHANNEL_WORKERS}
+        for ch in OUTBOX_HANDLERS:
+            wait = max(self.breakers[ch].retry_in(), self.buckets[ch].wait_time())
+            if ch in busy:
+                blocked[ch] = None
+            elif wait > 0:
+                blocked[ch] = wait
+        return blocked
+
+    def _dispatch(self):
+        """
+        Claim up to the number of idle workers; returns (claimed, next_due).
+        """
+        with self._lock:
+            free = self.workers - self._inflight
+        if free <= 0:
+            return 0, None
+        now = time.time()
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        blocked = self._blocked_channels()
+        # booking alerts are claimed in groups by _dispatch_digest
+        excluded = (*blocked, BOOKING_ALERT_CHANNEL)
+        skip = f"AND channel NOT IN ({','.join('?' * len(excluded))})"
+        db = thread_db()
+        try:
+            # give back rows whose worker died mid-send
+            db.execute(
+                "UPDATE notification_outbox SET status='pending', claimed_by=NULL "
+                "WHERE status='sending' AND claimed_at < ?",
+                (now - OUTBOX_LEASE_SECONDS,),
+            )
+            db.execute(
+                """
+                UPDATE notification_outbox SET status='sending', claimed_by=?, claimed_at=?
+                WHERE id IN (
+                    SELECT id FROM notification_outbox
+                    WHERE status='pending' AND next_attempt_at <= ? {skip}
+                    ORDER BY next_attempt_at LIMIT ?
+                )
+                """.format(skip=skip),
+                (token, now, now, *excluded, free),
+            )
+            db.commit()
+            rows = db.execute(
+                "SELECT * FROM notification_outbox WHERE claimed_by=? AND status='sending'", (token,)
+            ).fetchall()
+        except Exception:
+            db.rollback()
+            raise
+
+        submitted, throttled = 0, []
+        for row in rows:
+            channel = row["channel"]
+            # several rows of one channel can fill its worker cap, drain its bucket
+            # or follow a breaker probe within a single claim
+            with self._lock:
+                if self._channel_inflight.get(channel, 0) >= OUTBOX_CHANNEL_WORKERS:
+                    throttled.append((row["next_attempt_at"], row["id"]))
+                    continue
+            wait = self.breakers[channel].retry_in() or self.buckets[channel].take()
+            if wait:
+                throttled.append((now + wait, row["id"]))
+                continue
+            with self._lock:
+                self._inflight += 1
+                self._channel_inflight[channel] = self._channel_inflight.get(channel, 0) + 1
+            self.breakers[channel].begin()
+            self._pool.submit(self._deliver, dict(row))
+            submitted += 1
+        if throttled:
+            self._release(db, throttled)
+
+        digest_due = None
+        if submitted < free:
+            sent, digest_due = self._dispatch_digest(db, now)
+            submitted += sent
+
+        next_due = None
+        if not submitted:
+            wake_at = [now + w for w in blocked.values() if w is not None]
+            if digest_due is not None:
+                wake_at.append(digest_due)
+            row = db.execute(
+                f"SELECT MIN(next_attempt_at) FROM notification_outbox WHERE status='pending' {skip}",
+                excluded,
+            ).fetchone()
+            if row[0] is not None:
+                wake_at.append(row[0])
+            next_due = min(wake_at) if wake_at else None
+        return submitted, next_due
+
+    def _dispatch_digest(self, db, now):
+        """
+        Send due booking alerts as one Telegram message: right away after a quiet
+        spell, else once TELEGRAM_DIGEST_WINDOW has passed since the last digest
+        or TELEGRAM_DIGEST_MAX alerts are waiting. Returns (submitted, next_due).
+        The window is a DIGEST_LEASE row in scheduler_lease (expires_at = next
+        allowed flush), so all gunicorn workers share one digest per window.
+        """
+        with self._lock:
+            if self._channel_inflight.get(BOOKING_ALERT_CHANNEL, 0):
+                return 0, None  # its _deliver_digest wakes the dispatcher
+        waiting, first_due = db.execute(
+            "SELECT SUM(next_attempt_at <= ?), MIN(next_attempt_at) FROM notification_outbox "
+            "WHERE status='pending' AND channel=?",
+            (now, BOOKING_ALERT_CHANNEL),
+        ).fetchone()
+        if not waiting:
+            return 0, first_due
+        full = waiting >= TELEGRAM_DIGEST_MAX
+        row = db.execute("SELECT expires_at FROM scheduler_lease WHERE name=?", (DIGEST_LEASE,)).fetchone()
+        if row and not full and now < row["expires_at"]:
+            return 0, row["expires_at"]
+        wait = self.breakers["telegram"].retry_in() or self.buckets["telegram"].take()
+        if wait:
+            return 0, now + wait
+
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        try:
+            # take the flush slot; loses to another worker that flushed in the meantime
+            taken = db.execute(
+                """
+                INSERT INTO scheduler_lease (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE scheduler_lease.expires_at <= ? OR ?
+                """,
+                (DIGEST_LEASE, token, now + TELEGRAM_DIGEST_WINDOW, now, full),
+            ).rowcount
+            if not taken:
+                db.rollback()
+                row = db.execute("SELECT expires_at FROM scheduler_lease WHERE name=?", (DIGEST_LEASE,)).fetchone()
+                return 0, row["expires_at"] if row else None
+            db.execute(
+                """
+                UPDATE notification_outbox SET status='sending', claimed_by=?, claimed_at=?
+                WHERE id IN (
+                    SELECT id FROM notification_outbox
+                    WHERE status='pending' AND channel=? AND next_attempt_at <= ?
+                    ORDER BY id LIMIT ?
+                )
+                """,
+                (token, now, BOOKING_ALERT_CHANNEL, now, TELEGRAM_DIGEST_MAX),
+            )
+            db.commit()
+            rows = [dict(r) for r in db.execute(
+                "SELECT * FROM notification_outbox WHERE claimed_by=? AND status='sending' ORDER BY id", (token,)
+            )]
+        except Exception:
+            db.rollback()
+            raise
+        if not rows:
+            return 0, None
+        with self._lock:
+            self._inflight += 1
+            self._channel_inflight[BOOKING_ALERT_CHANNEL] = 1
+        self.breakers["telegram"].begin()
+        self._pool.submit(self._deliver_digest, rows)
+        return 1, None
+
+    def _deliver_digest(self, rows):
+        breaker = self.breakers["telegram"]
+        try:
+            text = telegram_digest_text([json.loads(r["payload"])["message"] for r in rows])
+            with app.app_context():
+                telegram_push(text)
+        except Exception as e:
+            breaker.failure()
+            for row in rows:
+                self._retry_or_fail(row, e)
+        else:
+            breaker.success()
+            ids = [r["id"] for r in rows]
+            self._finish(
+                ",".join(map(str, ids)),
+                f"UPDATE notification_outbox SET status='sent', sent_at=CURRENT_TIMESTAMP, claimed_by=NULL "
+                f"WHERE id IN ({','.join('?' * len(ids))})",
+                ids,
+            )
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._channel_inflight[BOOKING_ALERT_CHANNEL] = 0
+            self._wake.set()
+
+    def _release(self, db, rows):
+        """
+        Hand claimed rows back without spending an attempt.
+        """
+        try:
+            db.executemany(
+                "UPDATE notification_outbox SET status='pending', next_attempt_at=?, claimed_by=NULL WHERE id=?",
+                rows,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            app.logger.exception("Outbox release of %s rows failed", len(rows))
+
+    def _deliver(self, row):
+        breaker = self.breakers[row["channel"]]
+        try:
+            handler = OUTBOX_HANDLERS[row["channel"]]
+            with app.app_context():
+                handler(json.loads(row["payload"]))
+        except Exception as e:
+            breaker.failure()
+            self._retry_or_fail(row, e)
+        else:
+            breaker.success()
+            self._finish(row["id"], "UPDATE notification_outbox SET status='sent', sent_at=CURRENT_TIMESTAMP, claimed_by=NULL WHERE id=?", (row["id"],))
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._channel_inflight[row["channel"]] -= 1
+            self._wake.set()
+
+    def _retry_or_fail(self, row, error):
+        attempts = row["attempts"] + 1
+        max_attempts = OUTBOX_MAX_ATTEMPTS.get(row["channel"], 3)
+        if attempts >= max_attempts:
+            app.logger.error("Outbox #%s (%s) failed permanently after %s attempts: %s",
+                             row["id"], row["channel"], attempts, error)
+            self._finish(row["id"],
+                         "UPDATE notification_outbox SET status='failed', attempts=?, last_error=?, claimed_by=NULL WHERE id=?",
+                         (attempts, str(error), row["id"]))
+            return
+        delay = min(OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX)
+        app.logger.warning("Outbox #%s (%s) attempt %s failed, retry in %ss: %s",
+                           row["id"], row["channel"], attempts, delay, error)
+        self._finish(row["id"],
+                     "UPDATE notification_outbox SET status='pending', attempts=?, next_attempt_at=?, last_error=?, claimed_by=NULL WHERE id=?",
+                     (attempts, time.time() + delay, str(error), row["id"]))
+
+    def _finish(self, outbox_id, sql, params):
+        db = thread_db()
+        try:
+            db.execute(sql, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            app.logger.exception("Outbox #%s state update failed", outbox_id)
+
+# started lazily by the first wake() in each process
+outbox = NotificationOutbox()
+
+# ---------------- Scheduler leader election (one runner per deployment) ----------------
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", 60))
+SCHEDULER_SLOW_JOB_SECONDS = float(os.getenv("SCHEDULER_SLOW_JOB_SECONDS", 60))
+
+class SchedulerLeader:
+    """
+    Lease row in scheduler_lease: every worker tries to take or renew it,
+    only the current holder runs scheduled jobs. If the leader dies its lease
+    expires and the next renew() from another worker takes over.
+    """
+
+    def __init__(self, name="scheduler"):
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._expires_at = 0.0
+
+    def renew(self):
+        if os.getpid() != int(self.holder.split(":")[1]):
+            # forked child: never reuse the parent's identity
+            self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._expires_at = 0.0
+        now = time.time()
+        expires_at = now + SCHEDULER_LEASE_SECONDS
+        db = thread_db()
+        try:
+            db.execute(
+                """
+                INSERT INTO scheduler_lease (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, expires_at=excluded.expires_at
+                WHERE scheduler_lease.holder = excluded.holder OR scheduler_lease.expires_at < ?
+                """,
+                (self.name, self.holder, expires_at, now),
+            )
+            db.commit()
+            row = db.execute("SELECT holder FROM scheduler_lease WHERE name=?", (self.name,)).fetchone()
+        except Exception:
+            db.rollback()
+            app.logger.exception("Scheduler lease renew failed")
+            return False
+        was_leader = self.is_leader()
+        if row and row["holder"] == self.holder:
+            self._expires_at = expires_at
+            if not was_leader:
+                app.logger.info("Scheduler leader: %s", self.holder)
+        else:
+            self._expires_at = 0.0
+        return self.is_leader()
+
+    def is_leader(self):
+        return self._expires_at > time.time()
+
+    def release(self):
+        if not self.is_leader():
+            return
+        db = thread_db()
+        db.execute("DELETE FROM scheduler_lease WHERE name=? AND holder=?", (self.name, self.holder))
+        db.commit()
+        self._expires_at = 0.0
+
+scheduler_leader = SchedulerLeader()
+
+def leader_job(name):
+    """
+    Run the wrapped job only on the leader, at most once per scheduled minute,
+    and record it in job_runs with its duration.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper():
+            if not scheduler_leader.is_leader():
+                return
+            run_key = datetime.now().strftime("%Y-%m-%dT%H:%M")
+            db = thread_db()
+            # we hold the lease, so a run still 'running' under another holder belongs to
+            # a leader that died mid-job; close it so it does not count as an overlap forever
+            cur = db.execute(
+                "UPDATE job_runs SET status='abandoned', finished_at=CURRENT_TIMESTAMP "
+                "WHERE job=? AND status='running' AND holder != ?",
+                (name, scheduler_leader.holder),
+            )
+            if cur.rowcount:
+                app.logger.warning("Job %s: marked %s run(s) of a previous leader abandoned", name, cur.rowcount)
+            running = db.execute(
+                "SELECT COUNT(*) FROM job_runs WHERE job=? AND status='running'", (name,)
+            ).fetchone()[0]
+            if running:
+                app.logger.warning("Job %s overlaps %s unfinished run(s)", name, running)
+            cur = db.execute(
+                "INSERT OR IGNORE INTO job_runs (job, run_key, holder) VALUES (?, ?, ?)",
+                (name, run_key, scheduler_leader.holder),
+            )
+            db.commit()
+            if cur.rowcount == 0:
+                app.logger.info("Job %s already ran for %s", name, run_key)
+                return
+            run_id = cur.lastrowid
+
+            started = time.perf_counter()
+            status, error = "ok", None
+            try:
+                func()
+            except Exception as e:
+                status, error = "error", str(e)
+                app.logger.exception("Job %s failed", name)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms > SCHEDULER_SLOW_JOB_SECONDS * 1000:
+                app.logger.warning("Job %s slow: %.0f ms", name, duration_ms)
+            db.execute(
+                "UPDATE job_runs SET finished_at=CURRENT_TIMESTAMP, duration_ms=?, status=?, error=? WHERE id=?",
+                (duration_ms, status, error, run_id),
+            )
+            db.commit()
+        return wrapper
+    return decorator
+
+CHANGES_RETENTION_DAYS = int(os.getenv("CHANGES_RETENTION_DAYS", 7))
+
+def prune_booking_changes():
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM booking_changes WHERE changed_at < datetime('now', ?)",
+                   (f"-{CHANGES_RETENTION_DAYS} days",))
+        db.commit()
+
+# ---------------- Hot/cold archiving ----------------
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))
+# 0 keeps archived bookings forever
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 0))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", 0.05))
+
+def archive_old_bookings(after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move bookings whose event_date is older than `after_days` into the archive,
+    skipping legacy free-text dates (they do not compare as dates),
+    `batch_size` rows per short transaction so /book writers are not blocked.
+    booking_stats keeps counting archived rows; search and the change feed see deletes.
+    """
+    cutoff = (date.today() - timedelta(days=after_days)).isoformat()
+    moved = 0
+    with app.app_context():
+        db = get_db()
+        while True:
+            try:
+                db.execute("INSERT OR IGNORE INTO bulk_load (id) VALUES (1)")
+                ids = [r[0] for r in db.execute(
+                    f"SELECT id FROM bookings WHERE {ISO_DATE_GLOB} AND event_date < ? ORDER BY event_date LIMIT ?",
+                    (cutoff, batch_size),
+                )]
+                if not ids:
+                    db.rollback()
+                    break
+                marks = ",".join("?" * len(ids))
+                # INSERT OR REPLACE keeps a re-run idempotent if a previous batch
+                # was copied but not deleted (attached DBs commit separately in WAL)
+                db.execute(
+                    f"INSERT OR REPLACE INTO {ARCHIVE_TABLE} ({BOOKING_COLUMNS}) "
+                    f"SELECT {BOOKING_COLUMNS} FROM bookings WHERE id IN ({marks})",
+                    ids,
+                )
+                db.execute(f"DELETE FROM bookings WHERE id IN ({marks})", ids)
+                db.execute("DELETE FROM bulk_load")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            moved += len(ids)
+            time.sleep(ARCHIVE_BATCH_PAUSE)
+    if moved:
+        app.logger.info("Archived %s bookings with event_date < %s", moved, cutoff)
+    return moved
+
+def purge_archive(retention_days=ARCHIVE_RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Retention: permanently delete archived bookings older than `retention_days`.
+    """
+    if not retention_days:
+        return 0
+    cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+    purged = 0
+    with app.app_context():
+        db = get_db()
+        while True:
+            cur = db.execute(
+                f"DELETE FROM {ARCHIVE_TABLE} WHERE id IN "
+                f"(SELECT id FROM {ARCHIVE_TABLE} WHERE {ISO_DATE_GLOB} AND event_date < ? LIMIT ?)",
+                (cutoff, batch_size),
+            )
+            if cur.rowcount <= 0:
+                db.rollback()
+                break
+            # archive-inclusive responses are cached under the bookings version
+            db.execute("UPDATE db_version SET version = version + 1 WHERE id = 1")
+            db.commit()
+            purged += cur.rowcount
+            time.sleep(ARCHIVE_BATCH_PAUSE)
+    if purged:
+        app.logger.info("Purged %s archived bookings with event_date < %s", purged, cutoff)
+    return purged
+
+def run_archiver():
+    archive_old_bookings()
+    purge_archive()
+
+@app.cli.command("archive-bookings")
+@click.option("--days", default=ARCHIVE_AFTER_DAYS, show_default=True, help="archive events older than this")
+@click.option("--retention-days", default=ARCHIVE_RETENTION_DAYS, show_default=True, help="0 = keep archive forever")
+def archive_bookings_command(days, retention_days):
+    init_db()
+    moved = archive_old_bookings(after_days=days)
+    purged = purge_archive(retention_days=retention_days)
+    print(f"Archived {moved} bookings, purged {purged} from the archive")
+
+scheduler = None
+
+def start_scheduler():
+    """
+    Start the background scheduler in this process (every worker renews the
+    lease, only the leader runs jobs). Called via start_background().
+    """
+    global scheduler
+    if scheduler is not None:
+        return scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(scheduler_leader.renew, 'interval', seconds=SCHEDULER_LEASE_SECONDS / 3,
+                      next_run_time=datetime.now())
+    scheduler.add_job(leader_job("daily_admin_report")(daily_admin_report), 'cron', hour=8, minute=0)  # 08:00 server time
+    scheduler.add_job(leader_job("prune_booking_changes")(prune_booking_changes), 'cron', minute=30)
+    scheduler.add_job(leader_job("archive_bookings")(run_archiver), 'cron', hour=3, minute=15)
+    scheduler.start()
+    return scheduler
+
+_background = {"atexit": False}
+
+def start_background():
+    """
+    Scheduler + outbox for this worker; safe to call more than once.
+    """
+    start_scheduler()
+    outbox.start()
+    if not _background["atexit"]:
+        atexit.register(stop_background)
+        _background["atexit"] = True
+
+def stop_background():
+    global scheduler
+    if scheduler is not None:
+        try:
+            scheduler.shutdown(wait=False)
+            scheduler_leader.release()
+        except Exception:
+            pass
+        scheduler = None
+    outbox.shutdown(wait=False)
+    close_receipt_pool()
 
 # ---------------- Utility ----------------
 def render_with_values(message, category="danger", **kwargs):
     flash(message, category)
     return render_template("book.html", **kwargs)
 
+# without a form key, identical (name, phone, date, service) submissions within
+# this many seconds are treated as the same booking
+BOOKING_DEDUP_WINDOW = int(os.getenv("BOOKING_DEDUP_WINDOW", 600))
+
+def booking_idempotency_keys(form, headers, name, phone, event_date, service):
+    """
+    Candidate keys for a /book submission, the one to store first.
+    The form's hidden idempotency_key (or an Idempotency-Key header) wins;
+    otherwise a hash of the booking fields per BOOKING_DEDUP_WINDOW bucket,
+    plus the previous bucket so a retry across a bucket edge still matches.
+    """
+    key = (form.get("idempotency_key") or headers.get("Idempotency-Key") or "").strip()
+    if key:
+        return [f"form:{key[:128]}"]
+    base = "|".join([name.casefold(), phone, event_date, service.casefold()])
+    bucket = int(time.time() // BOOKING_DEDUP_WINDOW)
+    return [
+        "auto:" + hashlib.sha256(f"{base}|{b}".encode("utf-8")).hexdigest()
+        for b in (bucket, bucket - 1)
+    ]
+
+def find_booking_by_keys(db, keys):
+    row = db.execute(
+        f"SELECT id FROM bookings WHERE idempotency_key IN ({','.join('?' * len(keys))}) LIMIT 1", keys
+    ).fetchone()
+    return row["id"] if row else None
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# SQL twin of ISO_DATE: archiving compares event_date as text, which only orders ISO dates
+ISO_DATE_GLOB = "event_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+def is_iso_date(value):
+    if not ISO_DATE.match(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+def validate_booking(name, location, phone, event_date, service, extras_list):
+    """
+    Booking form rules shared by /book and the bulk importer.
+    Returns the first error message, or None when the booking is valid.
+    """
+    if not name:
+        return "⚠ Please fill Name!"
+    if not location:
+        return "⚠ Please fill Location!"
+    if not phone:
+        return "⚠ Please fill Phone!"
+    if not event_date:
+        return "⚠ Please fill Date!"
+    if not is_iso_date(event_date):
+        return "⚠ Please enter Date as YYYY-MM-DD!"
+    if not service:
+        return "⚠ Please select Service!"
+    if len(extras_list) == 0:
+        return "⚠ Select Additional Services!"
+    return None
+
+# ---------------- Event-date capacity ----------------
+# events per day across all services (0 = unlimited) and per-service limits,
+# e.g. SERVICE_CAPACITY="Wedding=2,Reception=2"
+DAILY_CAPACITY = int(os.getenv("DAILY_CAPACITY", 0))
+SERVICE_CAPACITY = {
+    k.strip(): int(v)
+    for k, v in (item.split("=", 1) for item in os.getenv("SERVICE_CAPACITY", "").split(",") if "=" in item)
+}
+# rejected bookings free their slot
+OCCUPYING = "COALESCE(status, 'Pending') != 'Rejected'"
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", 366))
+AVAILABILITY_MAX_AGE = int(os.getenv("AVAILABILITY_MAX_AGE", 30))
+
+def occupancy(db, date_from, date_to):
+    """
+    {event_date: {service: count}} of occupying bookings, from idx_bookings_occupancy alone.
+    """
+    rows = db.execute(
+        f"""
+        SELECT event_date, COALESCE(service, '') AS service, COUNT(*) AS n FROM bookings
+        WHERE event_date BETWEEN ? AND ? AND {OCCUPYING}
+        GROUP BY event_date, service
+        """,
+        (date_from, date_to),
+    )
+    result = {}
+    for r in rows:
+        result.setdefault(r["event_date"], {})[r["service"]] = r["n"]
+    return result
+
+def capacity_error(db, event_date, service):
+    """
+    Error message when event_date is over capacity (counts include the caller's
+    uncommitted insert), else None.
+    """
+    if not DAILY_CAPACITY and service not in SERVICE_CAPACITY:
+        return None
+    by_service = occupancy(db, event_date, event_date).get(event_date, {})
+    if DAILY_CAPACITY and sum(by_service.values()) > DAILY_CAPACITY:
+        return f"⚠ {event_date} is fully booked. Please choose another date."
+    limit = SERVICE_CAPACITY.get(service)
+    if limit is not None and by_service.get(service, 0) > limit:
+        return f"⚠ {service} is fully booked on {event_date}. Please choose another date."
+    return None
+
+# ---------------- Static images (responsive, fingerprinted variants) ----------------
+STATIC_DIR = BASE / "static"
+ASSET_BUILD_DIR = STATIC_DIR / "build"
+ASSET_MANIFEST = ASSET_BUILD_DIR / "manifest.json"
+ASSET_SOURCES = ["images/hero.jpg", "images/bg.jpg", "images/logo.jpg"]
+ASSET_WIDTHS = [int(w) for w in os.getenv("ASSET_WIDTHS", "480,960,1600").split(",")]
+ASSET_JPEG_QUALITY = int(os.getenv("ASSET_JPEG_QUALITY", 82))
+ASSET_WEBP_QUALITY = int(os.getenv("ASSET_WEBP_QUALITY", 78))
+ASSET_MAX_AGE = 31536000
+
+def _source_hash(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+def build_image_assets():
+    """
+    Resize every ASSET_SOURCES image to ASSET_WIDTHS (capped at its own width) as
+    progressive JPEG + WebP named <stem>-<width>w-<content hash>.<ext> under
+    static/build, and write the manifest the template helpers read.
+    """
+    from PIL import Image
+
+    ASSET_BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {"images": {}}
+    for name in ASSET_SOURCES:
+        src = STATIC_DIR / name
+        if not src.exists():
+            app.logger.warning("Asset source missing: %s", src)
+            continue
+        with Image.open(src) as im:
+            im = im.convert("RGB")
+            entry = {"source": _source_hash(src), "width": im.width, "height": im.height, "jpeg": [], "webp": []}
+            widths = sorted({w for w in ASSET_WIDTHS if w < im.width} | {im.width})
+            for width in widths:
+                height = round(im.height * width / im.width)
+                resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+                for fmt, ext, opts in (
+                    ("jpeg", "jpg", {"quality": ASSET_JPEG_QUALITY, "optimize": True, "progressive": True}),
+                    ("webp", "webp", {"quality": ASSET_WEBP_QUALITY, "method": 4}),
+                ):
+                    buf = BytesIO()
+                    resized.save(buf, fmt.upper(), **opts)
+                    data = buf.getvalue()
+                    filename = f"{src.stem}-{width}w-{hashlib.sha256(data).hexdigest()[:10]}.{ext}"
+                    target = ASSET_BUILD_DIR / filename
+                    if not target.exists():
+                        tmp = target.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                        tmp.write_bytes(data)
+                        os.replace(tmp, target)
+                    entry[fmt].append([width, f"build/{filename}"])
+        manifest["images"][name] = entry
+
+    tmp = ASSET_MANIFEST.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, ASSET_MANIFEST)
+
+    # drop variants of earlier builds
+    keep = {path for e in manifest["images"].values() for fmt in ("jpeg", "webp") for _, path in e[fmt]}
+    for entry in os.scandir(ASSET_BUILD_DIR):
+        if entry.name.endswith((".jpg", ".webp")) and f"build/{entry.name}" not in keep:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    return manifest
+
+def ensure_image_assets():
+    """
+    Rebuild when the manifest is missing or a source image changed; templates fall
+    back to the original files if Pillow is unavailable.
+    """
+    try:
+        images = json.loads(ASSET_MANIFEST.read_text()).get("images", {})
+        if all(name in images and images[name]["source"] == _source_hash(STATIC_DIR / name)
+               for name in ASSET_SOURCES if (STATIC_DIR / name).exists()):
+            return
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    try:
+        build_image_assets()
+    except Exception as e:
+        app.logger.warning("Image asset build skipped: %s", e)
+
+_manifest_cache = {"mtime": None, "images": {}}
+
+def asset_manifest():
+    """
+    images section of the manifest, re-read only when the file changes.
+    """
+    try:
+        mtime = ASSET_MANIFEST.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache["mtime"] != mtime:
+        try:
+            _manifest_cache["images"] = json.loads(ASSET_MANIFEST.read_text()).get("images", {})
+        except ValueError:
+            return {}
+        _manifest_cache["mtime"] = mtime
+    return _manifest_cache["images"]
+
+def asset_url(name, width=None, fmt="jpeg"):
+    """
+    URL of the smallest variant at least `width` px wide (largest if None),
+    or of the original file when no build exists.
+    """
+    variants = asset_manifest().get(name, {}).get(fmt)
+    if not variants:
+        return url_for("static", filename=name)
+    path = variants[-1][1]
+    if width:
+        path = next((p for w, p in variants if w >= width), path)
+    return url_for("static", filename=path)
+
+def asset_srcset(name, fmt="webp"):
+    """
+    srcset value for <img>/<source>: "url 480w, url 960w, ...".
+    """
+    variants = asset_manifest().get(name, {}).get(fmt)
+    if not variants:
+        return url_for("static", filename=name)
+    return ", ".join(f"{url_for('static', filename=p)} {w}w" for w, p in variants)
+
+def asset_image_set(name, width=None):
+    """
+    CSS background value preferring WebP: image-set(url(...) type(...), ...).
+    """
+    if not asset_manifest().get(name):
+        return Markup(f'url("{url_for("static", filename=name)}")')
+    return Markup(
+        f'image-set(url("{asset_url(name, width, "webp")}") type("image/webp"), '
+        f'url("{asset_url(name, width, "jpeg")}") type("image/jpeg"))'
+    )
+
+@app.context_processor
+def asset_helpers():
+    return {"asset_url": asset_url, "asset_srcset": asset_srcset, "asset_image_set": asset_image_set}
+
+@app.after_request
+def cache_built_assets(response):
+    """
+    Fingerprinted files never change under the same name: cache them for a year.
+    """
+    filename = (request.view_args or {}).get("filename", "") if request.endpoint == "static" else ""
+    if filename.startswith("build/") and filename != "build/manifest.json" and response.status_code in (200, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    manifest = build_image_assets()
+    for name, entry in manifest["images"].items():
+        print(f"{name}: {', '.join(str(w) for w, _ in entry['webp'])} px (jpeg + webp)")
+    print(f"Manifest written to {ASSET_MANIFEST}")
+
+# ---------------- Bulk import (CSV / NDJSON) ----------------
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+IMPORT_MAX_ERRORS = 100
+IMPORT_STATUSES = {"Pending", "Confirmed", "Rejected"}
+IMPORT_INSERT_SQL = """
+    INSERT INTO bookings (name, location, phone, event_date, service, extras, notes, customer_email, status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, 'Pending'), COALESCE(?, CURRENT_TIMESTAMP))
+"""
+
+def iter_import_records(text_stream, fmt):
+    """
+    Yield (line_no, dict) from a CSV (header row) or NDJSON text stream.
+    """
+    if fmt == "ndjson":
+        for line_no, line in enumerate(text_stream, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, e
+    else:
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+
+def import_record_values(record):
+    """
+    Validate one imported record with the /book rules; returns (values, error).
+    """
+    def field(*keys):
+        for k in keys:
+            v = record.get(k)
+            if v not in (None, ""):
+                return str(v).strip()
+        return ""
+
+    extras = record.get("extras")
+    extras_list = extras if isinstance(extras, list) else [x.strip() for x in (extras or "").split(",") if x.strip()]
+    name, location, phone = field("name"), field("location"), field("phone")
+    event_date, service = field("event_date"), field("service")
+    error = validate_booking(name, location, phone, event_date, service, extras_list)
+    if error:
+        return None, error
+    status = field("status") or None
+    if status and status not in IMPORT_STATUSES:
+        return None, f"Unknown status {status!r}"
+    created_at = field("created_at") or None
+    if created_at:
+        # stored in the TIMESTAMP column, whose sqlite3 converter only reads "YYYY-MM-DD HH:MM:SS"
+        try:
+            parsed = datetime.fromisoformat(created_at)
+        except ValueError:
+            return None, f"created_at is not an ISO date/time: {created_at!r}"
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)  # CURRENT_TIMESTAMP is UTC
+        created_at = parsed.strftime("%Y-%m-%d %H:%M:%S")
+    return (
+        name, location, phone, event_date, service, ", ".join(extras_list),
+        field("notes"), field("customer_email", "email") or None,
+        status, created_at,
+    ), None
+
+def bulk_insert_bookings(db, batch):
+    """
+    executemany() with the per-row INSERT triggers switched off, then one
+    set-based pass each for FTS, booking_stats, booking_changes and db_version.
+    Runs inside the caller's transaction.
+    """
+    db.execute("INSERT OR IGNORE INTO bulk_load (id) VALUES (1)")
+    # we hold the write lock from here on, so new ids are all > first_id
+    first_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM bookings").fetchone()[0]
+    db.executemany(IMPORT_INSERT_SQL, batch)
+    tables = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if "bookings_fts" in tables:
+        db.execute(
+            f"INSERT INTO bookings_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+            f"SELECT id, {', '.join(SEARCH_COLUMNS)} FROM bookings WHERE id > ?",
+            (first_id,),
+        )
+    if "booking_stats" in tables:
+        db.execute(
+            """
+            INSERT INTO booking_stats (day, status, service, event_month, cnt)
+            SELECT date(created_at), COALESCE(status, 'Pending'), COALESCE(service, ''),
+                   substr(event_date, 1, 7), COUNT(*)
+            FROM bookings WHERE id > ? GROUP BY 1, 2, 3, 4
+            ON CONFLICT(day, status, service, event_month) DO UPDATE SET cnt = cnt + excluded.cnt
+            """,
+            (first_id,),
+        )
+    if "booking_changes" in tables:
+        db.execute(
+            "INSERT INTO booking_changes (booking_id, op, status) "
+            "SELECT id, 'insert', status FROM bookings WHERE id > ? ORDER BY id",
+            (first_id,),
+        )
+    db.execute("UPDATE db_version SET version = version + 1 WHERE id = 1")
+    db.execute("DELETE FROM bulk_load")
+
+def import_bookings(db, text_stream, fmt="csv", notify=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert valid records in batches of `batch_size`, one transaction per batch.
+    Without notify the batch goes through executemany and no outbox rows are
+    written; with notify each row gets the usual "Pending" email/WhatsApp.
+    """
+    summary = {"inserted": 0, "rejected": 0, "errors": []}
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        if notify:
+            for values in batch:
+                cur = db.execute(IMPORT_INSERT_SQL, values)
+                row = db.execute("SELECT * FROM bookings WHERE id=?", (cur.lastrowid,)).fetchone()
+                enqueue_booking_notifications(db, row, row["status"] or "Pending")
+        else:
+            bulk_insert_bookings(db, batch)
+        db.commit()
+        summary["inserted"] += len(batch)
+        batch.clear()
+
+    try:
+        for line_no, record in iter_import_records(text_stream, fmt):
+            if isinstance(record, Exception) or not isinstance(record, dict):
+                values, error = None, f"Invalid record: {record}"
+            else:
+                values, error = import_record_values(record)
+            if error:
+                summary["rejected"] += 1
+                if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+                    summary["errors"].append({"line": line_no, "error": error})
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        db.rollback()
+        raise
+    if notify and summary["inserted"]:
+        outbox.wake()
+    return summary
+
 # ---------------- ROUTES ----------------
 @app.route("/")
 def index():
@@ -379,75 +2612,58 @@ def book():
                         f"Hello%20JAGADHA,%20I%20want%20to%20discuss%20my%20booking."
 
         # Validations
-        if not name:
-            return render_with_values("⚠ Please fill Name!", name=name)
-        if not location:
-            return render_with_values("⚠ Please fill Location!", name=name, location=location)
-        if not phone:
-            return render_with_values("⚠ Please fill Phone!", name=name)
-        if not event_date:
-            return render_with_values("⚠ Please fill Date!", name=name)
-        if not service:
-            return render_with_values("⚠ Please select Service!", name=name)
-        if len(extras_list) == 0:
-            return render_with_values("⚠ Select Additional Services!", name=name)
+        error = validate_booking(name, location, phone, event_date, service, extras_list)
+        if error:
+            return render_with_values(error, name=name, location=location)
 
         db = get_db()
-        cur = db.execute(
-            """
-            INSERT INTO bookings (name, location, phone, event_date, service, extras, notes, customer_email)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (name, location, phone, event_date, service, extras, notes, customer_email),
-        )
-        db.commit()
+        # a double-click / browser retry gets the booking the first POST created,
+        # with no second insert and no second round of notifications
+        keys = booking_idempotency_keys(request.form, request.headers, name, phone, event_date, service)
+        existing = find_booking_by_keys(db, keys)
+        if existing:
+            return redirect(url_for("booking_success", booking_id=existing))
+        try:
+            cur = db.execute(
+                """
+                INSERT INTO bookings (name, location, phone, event_date, service, extras, notes, customer_email, idempotency_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (name, location, phone, event_date, service, extras, notes, customer_email, keys[0]),
+            )
+        except sqlite3.IntegrityError:
+            # lost the race against a concurrent retry of the same submission
+            db.rollback()
+            existing = find_booking_by_keys(db, keys)
+            if not existing:
+                raise
+            return redirect(url_for("booking_success", booking_id=existing))
         booking_id = cur.lastrowid
 
-        # Background notifications
-        def notify():
-            """
-            Background async notifier:
-            - Sends Brevo email (Admin + Customer)
-            - Sends WhatsApp confirmation
-            - Sends Telegram alert to admin
-            """
-            with app.app_context():
-                try:
-                    # 1) Always send ADMIN + CUSTOMER email (Pending)
-                    send_email_via_brevo(
-                        name, location, phone, event_date,
-                        service, extras, notes, customer_email,
-                        status="Pending",
-                        booking_id=booking_id
-                    )
-                except Exception:
-                    app.logger.exception("Error sending pending email")
-
-                # 2) WhatsApp message (best-effort)
-                try:
-                    wa_data = send_whatsapp_message(
-                        name, phone, event_date, service,
-                        extras, location, customer_email, notes
-                    )
-                except Exception:
-                    app.logger.exception("WhatsApp send failed")
-
-                # 3) Admin Telegram alert
-                try:
-                    telegram_push(
-                        f"📩 New Booking #{booking_id}\n"
-                        f"👤 {name}\n"
-                        f"🎈 {service}\n"
-                        f"📅 {event_date}"
-                    )
-                except Exception:
-                    app.logger.exception("Telegram push failed")
-
-        threading.Thread(target=notify, daemon=True).start()
+        # counted after the insert: the write lock is held, so concurrent bookings
+        # for the same date cannot both squeeze into the last slot
+        error = capacity_error(db, event_date, service)
+        if error:
+            db.rollback()
+            return render_with_values(error, name=name, location=location)
+
+        # Notifications are written to the outbox in the same transaction
+        # (email + WhatsApp for the customer, Telegram alert for the admin, coalesced into digests)
+        row = db.execute("SELECT * FROM bookings WHERE id=?", (booking_id,)).fetchone()
+        enqueue_booking_notifications(db, row, "Pending")
+        enqueue_notification(db, BOOKING_ALERT_CHANNEL, {
+            "message": f"📩 New Booking #{booking_id}\n"
+                       f"👤 {name}\n"
+                       f"🎈 {service}\n"
+                       f"📅 {event_date}"
+        }, booking_id=booking_id)
+        db.commit()
+        outbox.wake()
 
         return redirect(url_for("booking_success", booking_id=booking_id))
 
-    return render_template("book.html")
+    # rendered into a hidden idempotency_key field so retries of this form dedupe
+    return render_template("book.html", idempotency_key=uuid.uuid4().hex)
 
 @app.route("/booking/<int:booking_id>")
 def booking_success(booking_id):
@@ -457,11 +2673,9 @@ def booking_success(booking_id):
         flash("Booking not found", "danger")
         return redirect(url_for("index"))
 
-    wa = send_whatsapp_message(
-        row["name"], row["phone"], row["event_date"],
-        row["service"], row["extras"], row["location"],
-        row["customer_email"], row["notes"]
-    )
+    # links only; the QR image is fetched (and cached) via booking_whatsapp_qr
+    wa = whatsapp_links(row["name"], row["phone"], row["event_date"], row["service"], row["location"])
+    wa["qr_url"] = url_for("booking_whatsapp_qr", booking_id=booking_id, v=qr_version(wa["customer_link"]))
 
     return render_template(
         "booking_success.html",
@@ -469,15 +2683,100 @@ def booking_success(booking_id):
         wa=wa
     )
 
+@app.route("/booking/<int:booking_id>/whatsapp_qr.png")
+def booking_whatsapp_qr(booking_id):
+    row = get_db().execute(
+        "SELECT name, phone, event_date, service, location FROM bookings WHERE id=?", (booking_id,)
+    ).fetchone()
+    if not row:
+        return Response("Booking not found", status=404)
+
+    link = whatsapp_links(row["name"], row["phone"], row["event_date"], row["service"], row["location"])["customer_link"]
+    version = qr_version(link)
+    headers = {"ETag": f'"{version}"'}
+    # the URL carries ?v=<version>, so a versioned URL never changes content
+    if request.args.get("v") == version:
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        headers["Cache-Control"] = "public, no-cache"
+    if request.if_none_match.contains(version):
+        return Response(status=304, headers=headers)
+
+    try:
+        png = booking_qr_png(booking_id, link)
+    except Exception as e:
+        app.logger.exception("QR generation failed: %s", e)
+        return Response("QR unavailable", status=500)
+    return Response(png, mimetype="image/png", headers=headers)
+
+@app.route("/booking/<int:booking_id>/receipt.pdf")
+def booking_receipt(booking_id):
+    row = get_db().execute("SELECT * FROM bookings WHERE id=?", (booking_id,)).fetchone()
+    if not row:
+        return Response("Booking not found", status=404)
+
+    booking = booking_to_dict(row)
+    etag = receipt_key(booking)
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"})
+
+    pdf_bytes, _ = get_receipt_pdf(booking)
+    return Response(pdf_bytes, mimetype="application/pdf", headers={
+        "ETag": f'"{etag}"',
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"inline; filename=booking_{booking_id}.pdf",
+    })
 
 # ---------------- ADMIN & DASHBOARD ----------------
 @app.route("/admin")
 def admin():
     if not session.get("admin"):
         return redirect(url_for("login"))
-    rows = get_db().execute("SELECT * FROM bookings ORDER BY created_at DESC").fetchall()
+    source = bookings_source(wants_archive(request.args))
+    rows = get_db().execute(f"SELECT * FROM {source} ORDER BY created_at DESC").fetchall()
     return render_template("admin.html", bookings=rows)
 
+@app.route("/admin/import", methods=["POST"])
+def admin_import():
+    """
+    Bulk import: multipart field `file` or raw request body.
+    Query args: format=csv|ndjson (default from filename, else csv), notify=1.
+    """
+    if not session.get("admin"):
+        return jsonify({"error": "login required"}), 403
+
+    upload = request.files.get("file")
+    raw = upload.stream if upload else request.stream
+    filename = (upload.filename if upload else "") or ""
+    fmt = request.args.get("format") or ("ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "unsupported format"}), 400
+
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    started = time.perf_counter()
+    summary = import_bookings(get_db(), text, fmt, notify=request.args.get("notify") == "1")
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    app.logger.info("Bulk import: %s inserted, %s rejected", summary["inserted"], summary["rejected"])
+    return jsonify(summary)
+
+@app.cli.command("import-bookings")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None)
+@click.option("--notify/--no-notify", default=False, help="queue customer notifications for imported rows")
+@click.option("--batch-size", default=IMPORT_BATCH_SIZE, show_default=True)
+def import_bookings_command(path, fmt, notify, batch_size):
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    init_db()
+    started = time.perf_counter()
+    with app.app_context(), open(path, encoding="utf-8-sig", newline="") as f:
+        summary = import_bookings(get_db(), f, fmt, notify=notify, batch_size=batch_size)
+    print(f"Imported {summary['inserted']} bookings, rejected {summary['rejected']} "
+          f"in {time.perf_counter() - started:.2f}s")
+    for err in summary["errors"]:
+        print(f"  line {err['line']}: {err['error']}")
+    if notify and summary["inserted"]:
+        print("Notifications queued in notification_outbox; they are sent by the app's outbox workers.")
+
 @app.route("/admin/dashboard")
 def admin_dashboard():
     if not session.get("admin"):
@@ -487,44 +2786,424 @@ def admin_dashboard():
 # JSON endpoint used by dashboard
 @app.route("/api/bookings")
 def api_bookings():
+    """
+    Newest-first booking list, keyset-paginated on (created_at, id).
+    Query args: limit, cursor (from previous next_cursor) + booking_filters().
+    ?format=columns returns {"fields": [...], "rows": [[...], ...], "next_cursor"}
+    instead of one object per booking.
+    """
     if not session.get("admin"):
         return jsonify({"bookings":[]})
 
-    rows = get_db().execute("SELECT * FROM bookings ORDER BY created_at DESC").fetchall()
+    db = get_db()
+    etag = f"bookings-{bookings_version(db)}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
-    bookings = []
+    if request.args.get("format", "json") not in ("json", "columns"):
+        return jsonify({"error": "unsupported format"}), 400
+    try:
+        body = cached_response_body((etag, request.full_path), lambda: build_bookings_page(db, request.args))
+    except InvalidCursor:
+        return jsonify({"error": "invalid cursor"}), 400
+    return Response(body, mimetype="application/json",
+                    headers={"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"})
+
+def build_bookings_page(db, args):
+    try:
+        limit = int(args.get("limit", BOOKINGS_PAGE_SIZE))
+    except ValueError:
+        limit = BOOKINGS_PAGE_SIZE
+    limit = max(1, min(limit, BOOKINGS_MAX_PAGE_SIZE))
+
+    clauses, params = booking_filters(args)
+    cursor = args.get("cursor")
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise InvalidCursor(cursor)
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(position)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # fetch one extra row to know whether another page exists
+    cur = db.execute(
+        f"SELECT {BOOKING_SELECT} FROM {bookings_source(wants_archive(args))} {where} "
+        f"ORDER BY created_at DESC, id DESC LIMIT ?",
+        (*params, limit + 1),
+    )
+    cur.row_factory = None  # plain tuples in BOOKING_FIELDS order
+    rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[_CREATED_AT], last[_ID])
+
+    fmt = args.get("format", "json")
+    with observe_time(RENDER_SECONDS, f"bookings_{fmt}"):
+        if fmt == "columns":
+            # same value encoding as the default format (Flask's provider), only a compact layout
+            return json.dumps({"fields": BOOKING_FIELDS, "rows": rows, "next_cursor": next_cursor},
+                              separators=(",", ":"), ensure_ascii=False, default=app.json.default)
+        bookings = [dict(zip(BOOKING_FIELDS, r)) for r in rows]
+        return app.json.dumps({"bookings": bookings, "next_cursor": next_cursor})
+
+# Live change feed: JSON (optionally long-polling with ?wait=) or Server-Sent Events.
+# A waiting request holds its worker for the whole wait, which under gunicorn's default
+# sync workers takes capacity away from /book. Long polls are therefore kept short, and
+# SSE is opt-in (CHANGES_SSE=1). Enable it only with a threaded or async worker class,
+# e.g. `gunicorn -k gthread --threads 8` or `-k gevent`.
+CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", 500))
+CHANGES_POLL_SECONDS = float(os.getenv("CHANGES_POLL_SECONDS", 1))
+CHANGES_MAX_WAIT_SECONDS = float(os.getenv("CHANGES_MAX_WAIT_SECONDS", 5))
+CHANGES_SSE = os.getenv("CHANGES_SSE", "0") == "1"
+CHANGES_STREAM_SECONDS = float(os.getenv("CHANGES_STREAM_SECONDS", 300))
+
+def fetch_changes(db, since, limit=CHANGES_PAGE_SIZE):
+    """
+    Changes after `since` with the current booking row attached (None for deletes).
+    Returns (changes, last_seq, reset) — reset=True means `since` was already pruned
+    and the client must reload the full list.
+    """
+    oldest = db.execute("SELECT MIN(seq) FROM booking_changes").fetchone()[0]
+    reset = oldest is not None and since < oldest - 1
+    rows = db.execute(
+        """
+        SELECT c.seq, c.booking_id, c.op, c.status AS change_status, c.changed_at, b.*
+        FROM booking_changes c LEFT JOIN bookings b ON b.id = c.booking_id
+        WHERE c.seq > ? ORDER BY c.seq LIMIT ?
+        """,
+        (since, limit),
+    ).fetchall()
+    changes = []
     for r in rows:
-        # safe access to status (backwards compatible)
-        status = r["status"] if "status" in r.keys() else "Pending"
-        bookings.append({
-            "id": r["id"],
-            "name": r["name"],
-            "phone": r["phone"],
-            "location": r["location"],
-            "event_date": r["event_date"],
-            "service": r["service"],
-            "extras": r["extras"],
-            "notes": r["notes"],
-            "customer_email": r["customer_email"],
-            "status": status,
-            "created_at": r["created_at"],
+        changes.append({
+            "seq": r["seq"],
+            "op": r["op"],
+            "booking_id": r["booking_id"],
+            "status": r["change_status"],
+            "changed_at": r["changed_at"],
+            "booking": booking_to_dict(r) if r["id"] is not None else None,
         })
+    last_seq = changes[-1]["seq"] if changes else since
+    return changes, last_seq, reset
+
+def current_change_seq(db):
+    return db.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_changes").fetchone()[0]
+
+@app.route("/api/bookings/changes")
+def api_booking_changes():
+    """
+    ?since=<seq> -> changes after seq. Without `since` only the current seq is
+    returned (load /api/bookings first, then follow the feed).
+    Send Accept: text/event-stream (EventSource) for SSE when CHANGES_SSE is on;
+    Last-Event-ID resumes.
+    """
+    if not session.get("admin"):
+        return jsonify({"changes": []}), 403
+
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    db = get_db()
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({"error": "invalid since"}), 400
+
+    if request.accept_mimetypes.best == "text/event-stream":
+        if not CHANGES_SSE:
+            return jsonify({"error": "SSE is disabled; poll with ?since=&wait="}), 406
+        if since is None:
+            since = current_change_seq(db)
+        return Response(stream_with_context(change_events(since)), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    if since is None:
+        return jsonify({"changes": [], "last_seq": current_change_seq(db), "reset": False})
+
+    try:
+        wait = min(float(request.args.get("wait", 0)), CHANGES_MAX_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+    deadline = time.monotonic() + wait
+    while True:
+        changes, last_seq, reset = fetch_changes(db, since)
+        if changes or reset or time.monotonic() >= deadline:
+            break
+        time.sleep(CHANGES_POLL_SECONDS)
+    return jsonify({"changes": changes, "last_seq": last_seq, "reset": reset})
+
+def change_events(since):
+    """
+    SSE generator; ends after CHANGES_STREAM_SECONDS so workers are not held
+    forever — EventSource reconnects with Last-Event-ID.
+    """
+    db = get_db()
+    yield "retry: 2000\n\n"
+    deadline = time.monotonic() + CHANGES_STREAM_SECONDS
+    last_beat = time.monotonic()
+    while time.monotonic() < deadline:
+        changes, since, reset = fetch_changes(db, since)
+        if reset:
+            yield "event: reset\ndata: {}\n\n"
+        for change in changes:
+            yield f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change, default=str)}\n\n"
+        if not changes:
+            if time.monotonic() - last_beat > 15:
+                yield ": keep-alive\n\n"
+                last_beat = time.monotonic()
+            time.sleep(CHANGES_POLL_SECONDS)
+
+@app.route("/api/bookings/search")
+def api_bookings_search():
+    """
+    Ranked full-text search over bookings_fts.
+    Query args: q, limit, offset.
+    """
+    if not session.get("admin"):
+        return jsonify({"bookings": []})
+
+    match = fts_query(request.args.get("q"))
+    if not match:
+        return jsonify({"bookings": [], "next_offset": None})
+    try:
+        limit = int(request.args.get("limit", BOOKINGS_PAGE_SIZE))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "invalid limit/offset"}), 400
+    limit = max(1, min(limit, BOOKINGS_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+
+    try:
+        rows = get_db().execute(
+            """
+            SELECT b.* FROM bookings_fts
+            JOIN bookings b ON b.id = bookings_fts.rowid
+            WHERE bookings_fts MATCH ?
+            ORDER BY bookings_fts.rank
+            LIMIT ? OFFSET ?
+            """,
+            (match, limit + 1, offset),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        app.logger.warning("Search failed for %r: %s", match, e)
+        return jsonify({"error": "search unavailable"}), 503
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    return jsonify({"bookings": [booking_to_dict(r) for r in rows], "next_offset": next_offset})
+
+@app.route("/api/availability")
+def api_availability():
+    """
+    Booked / full event dates for the booking form's calendar.
+    Query args: from / to (YYYY-MM-DD event dates, default today .. +90 days).
+    Only dates with bookings are listed.
+    """
+    try:
+        date_from = date.fromisoformat(request.args.get("from") or date.today().isoformat())
+        date_to = date.fromisoformat(request.args.get("to") or (date_from + timedelta(days=90)).isoformat())
+    except ValueError:
+        return jsonify({"error": "from / to must be YYYY-MM-DD"}), 400
+    if date_to < date_from or (date_to - date_from).days > AVAILABILITY_MAX_DAYS:
+        return jsonify({"error": f"range must be 0..{AVAILABILITY_MAX_DAYS} days"}), 400
+
+    db = get_db()
+    # the resolved range is part of the tag (and so of the cache key): the defaults move at midnight
+    etag = f"availability-{bookings_version(db)}-{date_from.isoformat()}-{date_to.isoformat()}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    def build():
+        dates = {}
+        for day, by_service in occupancy(db, date_from.isoformat(), date_to.isoformat()).items():
+            total = sum(by_service.values())
+            full_services = sorted(s for s, n in by_service.items() if s in SERVICE_CAPACITY and n >= SERVICE_CAPACITY[s])
+            dates[day] = {
+                "total": total,
+                "by_service": by_service,
+                "full": bool(DAILY_CAPACITY and total >= DAILY_CAPACITY),
+                "full_services": full_services,
+            }
+        return app.json.dumps({
+            "from": date_from.isoformat(), "to": date_to.isoformat(),
+            "capacity": {"daily": DAILY_CAPACITY or None, "services": SERVICE_CAPACITY},
+            "dates": dates,
+        })
+
+    body = cached_response_body((etag, request.full_path), build)
+    return Response(body, mimetype="application/json",
+                    headers={"ETag": f'"{etag}"', "Cache-Control": f"public, max-age={AVAILABILITY_MAX_AGE}"})
+
+# Aggregates for the dashboard, read from the booking_stats rollup
+@app.route("/api/stats")
+def api_stats():
+    """
+    Booking counts from booking_stats.
+    Query args: created_from / created_to (YYYY-MM-DD, booking creation day).
+    """
+    if not session.get("admin"):
+        return jsonify({}), 403
+
+    clauses, params = [], []
+    if request.args.get("created_from"):
+        clauses.append("day >= ?")
+        params.append(request.args["created_from"])
+    if request.args.get("created_to"):
+        clauses.append("day <= ?")
+        params.append(request.args["created_to"])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    db = get_db()
 
-    return jsonify({"bookings": bookings})
+    def grouped(column):
+        rows = db.execute(
+            f"SELECT {column} AS k, SUM(cnt) AS n FROM booking_stats {where} GROUP BY {column} ORDER BY {column}",
+            params,
+        ).fetchall()
+        return {r["k"]: r["n"] for r in rows}
+
+    by_status = grouped("status")
+    return jsonify({
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_service": grouped("service"),
+        "by_event_month": grouped("event_month"),
+        "by_day": grouped("day"),
+    })
+
+# Recent scheduled job runs (duration / overlaps)
+@app.route("/api/jobs")
+def api_jobs():
+    if not session.get("admin"):
+        return jsonify({"runs": []}), 403
+    rows = get_db().execute("SELECT * FROM job_runs ORDER BY id DESC LIMIT 50").fetchall()
+    return jsonify({"runs": [dict(r) for r in rows]})
+
+# CSV / NDJSON export (streamed)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 500))
+EXPORT_CSV_HEADER = ["id","name","phone","email","location","event_date","service","extras","notes","status","created_at"]
+
+def iter_export_rows(where, params, include_archive=False):
+    cur = get_db().execute(
+        f"SELECT * FROM {bookings_source(include_archive)} {where} ORDER BY created_at DESC, id DESC", params
+    )
+    while True:
+        rows = cur.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            break
+        yield rows
+
+def csv_chunks(row_chunks):
+    si = io.StringIO()
+    cw = csv.writer(si)
+    cw.writerow(EXPORT_CSV_HEADER)
+    for rows in row_chunks:
+        for r in rows:
+            cw.writerow([r["id"], r["name"], r["phone"], r["customer_email"], r["location"], r["event_date"], r["service"], r["extras"], r["notes"], r["status"], r["created_at"]])
+        yield si.getvalue().encode("utf-8")
+        si.seek(0)
+        si.truncate()
+    # header-only export when there are no rows
+    if si.tell():
+        yield si.getvalue().encode("utf-8")
+
+def ndjson_chunks(row_chunks):
+    for rows in row_chunks:
+        yield "".join(json.dumps(booking_to_dict(r), default=str, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
 
-# CSV export
 @app.route("/export_csv")
 def export_csv():
+    """
+    Stream bookings as CSV (default) or NDJSON (?format=ndjson), optionally as a .gz
+    download (?gzip=1); otherwise compressed on the wire per Accept-Encoding.
+    Accepts the same filters as /api/bookings.
+    """
     if not session.get("admin"):
         return redirect(url_for("login"))
-    rows = get_db().execute("SELECT * FROM bookings ORDER BY created_at DESC").fetchall()
-    si = io.StringIO()
-    cw = csv.writer(si)
-    cw.writerow(["id","name","phone","email","location","event_date","service","extras","notes","status","created_at"])
-    for r in rows:
-        cw.writerow([r["id"], r["name"], r["phone"], r["customer_email"], r["location"], r["event_date"], r["service"], r["extras"], r["notes"], r["status"], r["created_at"]])
-    output = si.getvalue()
-    return Response(output, mimetype="text/csv", headers={"Content-Disposition":"attachment;filename=bookings.csv"})
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in ("csv", "ndjson"):
+        return Response("Unsupported format", status=400)
+    etag = f"export-{bookings_version(get_db())}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    clauses, params = booking_filters(request.args)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    row_chunks = iter_export_rows(where, params, wants_archive(request.args))
+    if fmt == "ndjson":
+        chunks, mimetype, filename = ndjson_chunks(row_chunks), "application/x-ndjson", "bookings.ndjson"
+    else:
+        chunks, mimetype, filename = csv_chunks(row_chunks), "text/csv", "bookings.csv"
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if request.args.get("gzip") == "1":
+        chunks, mimetype, filename = encode_chunks(chunks, "gzip"), "application/gzip", filename + ".gz"
+    else:
+        encoding = accepted_encoding()
+        if encoding:
+            chunks = encode_chunks(chunks, encoding)
+            headers["Content-Encoding"] = encoding
+            etag = f"{etag}-{encoding}"
+
+    # streamed bodies are not kept in the response cache; the ETag alone saves the work
+    headers.update({"Content-Disposition": f"attachment;filename={filename}", "ETag": f'"{etag}"'})
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+def iter_receipt_bookings(where, params, include_archive=False):
+    for rows in iter_export_rows(where, params, include_archive):
+        for r in rows:
+            yield booking_to_dict(r)
+
+@app.route("/admin/receipts.zip")
+def export_receipts():
+    """
+    ZIP of PDF receipts for the bookings matching booking_filters()
+    (typically date_from / date_to and status), streamed as they render.
+    """
+    if not session.get("admin"):
+        return redirect(url_for("login"))
+
+    clauses, params = booking_filters(request.args)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    chunks = receipt_zip_chunks(iter_receipt_bookings(where, params, wants_archive(request.args)))
+    filename = "receipts_{}_{}.zip".format(filename_date(request.args.get("date_from")) or "all",
+                                           filename_date(request.args.get("date_to")) or "all")
+    return Response(stream_with_context(chunks), mimetype="application/zip",
+                    headers={"Content-Disposition": f"attachment;filename={filename}",
+                             "Cache-Control": "private, no-store"})
+
+@app.cli.command("export-receipts")
+@click.option("--date-from", help="event_date >= YYYY-MM-DD")
+@click.option("--date-to", help="event_date <= YYYY-MM-DD")
+@click.option("--status", help="Pending / Confirmed / Rejected")
+@click.option("--include-archive", is_flag=True)
+@click.option("--processes", default=RECEIPT_ZIP_PROCESSES, show_default=True, help="0 = render in this process")
+@click.option("--output", "-o", default="receipts.zip", show_default=True)
+def export_receipts_command(date_from, date_to, status, include_archive, processes, output):
+    init_db()
+    clauses, params = booking_filters({"date_from": date_from, "date_to": date_to, "status": status})
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    started = time.perf_counter()
+    count = 0
+
+    def counted(bookings):
+        nonlocal count
+        for b in bookings:
+            count += 1
+            yield b
+
+    with app.app_context(), open(output, "wb") as f:
+        for chunk in receipt_zip_chunks(counted(iter_receipt_bookings(where, params, include_archive)), processes):
+            f.write(chunk)
+    close_receipt_pool()
+    print(f"Wrote {count} receipts to {output} in {time.perf_counter() - started:.2f}s")
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -551,6 +3230,11 @@ def delete_booking(booking_id):
     flash("🗑️ Booking deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
+STATUS_SMS = {
+    "Confirmed": "🎉 Your booking for {event_date} is CONFIRMED!",
+    "Rejected": "❌ Your booking for {event_date} was rejected.",
+}
+
 @app.route("/confirm/<int:booking_id>")
 def confirm_booking(booking_id):
     if not session.get("admin"):
@@ -565,31 +3249,16 @@ def confirm_booking(booking_id):
 
     try:
         db.execute("UPDATE bookings SET status='Confirmed' WHERE id=?", (booking_id,))
+        enqueue_booking_notifications(
+            db, row, "Confirmed",
+            sms_message=STATUS_SMS["Confirmed"].format(event_date=row["event_date"]),
+        )
         db.commit()
     except sqlite3.OperationalError:
+        db.rollback()
         flash("Database missing 'status' column. Visit /fixdb to add it.", "danger")
         return redirect(url_for("admin_dashboard"))
-
-    # ✔ EMAIL
-    send_email_via_brevo(
-        row["name"], row["location"], row["phone"], row["event_date"],
-        row["service"], row["extras"], row["notes"], row["customer_email"],
-        status="Confirmed",
-        booking_id=booking_id
-    )
-
-    # ✔ WHATSAPP
-    try:
-        send_whatsapp_message(
-            row["name"], row["phone"], row["event_date"],
-            row["service"], row["extras"], row["location"],
-            row["customer_email"], row["notes"]
-        )
-    except:
-        app.logger.exception("WhatsApp send failed")
-
-    # ✔ SMS
-    send_sms_fast2sms(row["phone"], f"🎉 Your booking for {row['event_date']} is CONFIRMED!")
+    outbox.wake()
 
     flash("Booking Confirmed!", "success")
     return redirect(url_for("admin_dashboard"))
@@ -607,30 +3276,102 @@ def reject_booking(booking_id):
         return redirect(url_for("admin_dashboard"))
 
     db.execute("UPDATE bookings SET status='Rejected' WHERE id=?", (booking_id,))
+    enqueue_booking_notifications(
+        db, row, "Rejected",
+        sms_message=STATUS_SMS["Rejected"].format(event_date=row["event_date"]),
+    )
     db.commit()
+    outbox.wake()
 
-    # EMAIL
-    send_email_via_brevo(
-        row["name"], row["location"], row["phone"], row["event_date"],
-        row["service"], row["extras"], row["notes"], row["customer_email"],
-        status="Rejected",
-        booking_id=booking_id
-    )
+    flash("Booking Rejected!", "warning")
+    return redirect(url_for("admin_dashboard"))
 
-    # WHATSAPP
-    try:
-        send_whatsapp_message(
-            row["name"], row["phone"], row["event_date"],
-            row["service"], row["extras"], row["location"],
-            row["customer_email"], row["notes"]
-        )
-    except:
-        app.logger.exception("WhatsApp send failed")
+BULK_STATUS_MAX = int(os.getenv("BULK_STATUS_MAX", 1000))
 
-    # SMS Reject
-    send_sms_fast2sms(row["phone"], f"❌ Your booking for {row['event_date']} was rejected.")
+def parse_booking_ids(values):
+    """
+    ids from a JSON list, repeated form fields or comma separated strings.
+    """
+    ids = []
+    for value in values:
+        for part in str(value).split(","):
+            part = part.strip()
+            if part.isdigit():
+                ids.append(int(part))
+    return list(dict.fromkeys(ids))
+
+@app.route("/admin/bookings/status", methods=["POST"])
+def bulk_update_status():
+    """
+    Confirm or reject many bookings at once: one UPDATE ... WHERE id IN (...),
+    the customer notifications queued with one executemany, and a single summary
+    email to the admin instead of an admin copy per booking — all in one transaction.
+    Bookings already in the target status are left alone (no repeat notifications).
+    """
+    if not session.get("admin"):
+        return redirect(url_for("login"))
 
-    flash("Booking Rejected!", "warning")
+    data = request.get_json(silent=True) if request.is_json else None
+    if data is not None:
+        raw_ids, status = data.get("ids") or [], data.get("status")
+        if not isinstance(raw_ids, list):
+            raw_ids = [raw_ids]
+    else:
+        raw_ids, status = request.form.getlist("ids"), request.form.get("status")
+    status = (status or "").strip().capitalize()
+    ids = parse_booking_ids(raw_ids)
+
+    error = None
+    if status not in STATUS_SMS:
+        error = "status must be Confirmed or Rejected"
+    elif not ids:
+        error = "no booking ids given"
+    elif len(ids) > BULK_STATUS_MAX:
+        error = f"at most {BULK_STATUS_MAX} bookings per request"
+    if error:
+        if data is not None:
+            return jsonify({"error": error}), 400
+        flash(error, "danger")
+        return redirect(url_for("admin_dashboard"))
+
+    db = get_db()
+    marks = ",".join("?" * len(ids))
+    try:
+        rows = db.execute(
+            f"SELECT * FROM bookings WHERE id IN ({marks}) AND COALESCE(status, 'Pending') != ?",
+            (*ids, status),
+        ).fetchall()
+        changed = [r["id"] for r in rows]
+        if changed:
+            db.execute(
+                f"UPDATE bookings SET status=? WHERE id IN ({','.join('?' * len(changed))})",
+                (status, *changed),
+            )
+            items = []
+            for r in rows:
+                sms = STATUS_SMS[status].format(event_date=r["event_date"])
+                items.extend(booking_notifications(r, status, sms_message=sms, notify_admin=False))
+            summary = "\n".join(f"#{r['id']} {r['name']} — {r['service']} on {r['event_date']}" for r in rows)
+            items.append((None, "email", {
+                "name": "Admin", "location": "-", "phone": "-", "event_date": date.today().isoformat(),
+                "service": "-", "extras": "-", "customer_email": None,
+                "notes": f"{len(rows)} bookings marked {status}:\n{summary}",
+                "status": f"Bulk {status}",
+            }))
+            enqueue_notifications(db, items)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if changed:
+        outbox.wake()
+
+    updated = set(changed)
+    # skipped: unknown ids and bookings that already had this status
+    result = {"status": status, "updated": changed, "skipped": [i for i in ids if i not in updated]}
+    if data is not None:
+        return jsonify(result)
+    flash(f"{len(changed)} bookings {status}!", "success" if status == "Confirmed" else "warning")
     return redirect(url_for("admin_dashboard"))
 
 # ---------------- AUTO FIX DB ON STARTUP ----------------
@@ -642,17 +3383,72 @@ def auto_fix_db():
         print("AUTO-FIX ✔: 'status' column added")
     except Exception as e:
         print("AUTO-FIX ℹ: status column already exists / skipped:", e)
+    try:
+        db.execute("ALTER TABLE bookings ADD COLUMN idempotency_key TEXT")
+        db.commit()
+        print("AUTO-FIX ✔: 'idempotency_key' column added")
+    except Exception as e:
+        print("AUTO-FIX ℹ: idempotency_key column already exists / skipped:", e)
+    create_indexes(db)
+    create_stats_rollup(db)
+    create_search_index(db)
+    create_change_log(db)
+    create_version_counter(db)
+
+
+# ---------------- METRICS ENDPOINT ----------------
+# optional shared secret for scrapers: Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.route("/metrics")
+def metrics():
+    """
+    Prometheus text exposition. Values are per process: under gunicorn each
+    worker reports its own series.
+    """
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return Response("Unauthorized", status=401)
 
+    lines = []
+    for histogram in METRICS:
+        lines.extend(histogram.render())
+
+    lines.append("# HELP notification_outbox_depth Outbox rows by status")
+    lines.append("# TYPE notification_outbox_depth gauge")
+    try:
+        rows = get_db().execute("SELECT status, COUNT(*) AS n FROM notification_outbox GROUP BY status").fetchall()
+        for r in rows:
+            lines.append(f'notification_outbox_depth{{status="{_escape_label(r["status"])}"}} {r["n"]}')
+    except sqlite3.Error as e:
+        app.logger.warning("metrics: outbox depth unavailable: %s", e)
+    lines.append("# HELP notification_outbox_inflight Deliveries running in this process")
+    lines.append("# TYPE notification_outbox_inflight gauge")
+    lines.append(f"notification_outbox_inflight {outbox._inflight}")
+    lines.append("# HELP scheduler_is_leader 1 if this process holds the scheduler lease")
+    lines.append("# TYPE scheduler_is_leader gauge")
+    lines.append(f"scheduler_is_leader {int(scheduler_leader.is_leader())}")
+
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
 
 @app.route("/ping")
 def ping():
     return "pong"
 
+# ---------------- ENTRY POINTS ----------------
+def create_app():
+    """
+    Production entry point: gunicorn 'app:create_app()'
+    Sets up the schema and starts the scheduler + outbox for this worker.
+    """
+    init_db()
+    ensure_image_assets()
+    start_background()
+    return app
+
 # ---------------- MAIN ----------------
 if __name__ == "__main__":
     # Ensure DB fix runs before app starts
-    with app.app_context():
-        auto_fix_db()
+    create_app()
 
     try:
         app.run(
@@ -661,7 +3457,4 @@ if __name__ == "__main__":
             port=int(os.getenv("PORT", 5000))
         )
     finally:
-        try:
-            scheduler.shutdown()
-        except Exception:
-            pass
\ No newline at end of file
+        stop_background()
\ No newline at end of file
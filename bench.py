@@ -0,0 +1,378 @@
+# bench.py
+"""
+Reproducible benchmark for the booking, admin and export paths.
+
+Seeds a throwaway SQLite DB with N synthetic bookings, replaces Brevo,
+Fast2SMS, Telegram and qrcode with local fakes (optional artificial latency)
+and drives the app through the Flask test client.
+
+    python bench.py --rows 10000,100000 --iterations 200 --output bench_results.json
+
+Results are written as JSON so runs can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SERVICES = ["Wedding", "Birthday", "Engagement", "Reception", "Baby Shower", "Puberty Function"]
+LOCATIONS = ["Chennai", "Salem", "Madurai", "Coimbatore", "Trichy", "Erode"]
+STATUSES = ["Pending", "Confirmed", "Rejected"]
+
+
+# ---------------- Fakes for outbound providers ----------------
+class FakeProviders:
+    """
+    Stand-ins for the network / CPU heavy side effects, each sleeping `latency_ms`.
+    """
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.calls = {"email": 0, "sms": 0, "telegram": 0, "qr": 0}
+        self._lock = threading.Lock()
+
+    def _hit(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def email(self, *args, **kwargs):
+        self._hit("email")
+
+    def sms(self, phone, message):
+        self._hit("sms")
+
+    def telegram(self, message):
+        self._hit("telegram")
+
+    def qr_make(self, data):
+        self._hit("qr")
+        return FakeQR()
+
+class FakeQR:
+    def save(self, stream, *args, **kwargs):
+        stream.write(b"\x89PNG\r\n\x1a\nfake")
+
+
+def install_fakes(m, fakes):
+    import qrcode  # app imports it lazily, so patch the module itself
+    m.send_email_via_brevo = fakes.email
+    m.send_sms_fast2sms = fakes.sms
+    m.telegram_push = fakes.telegram
+    qrcode.make = fakes.qr_make
+
+# minimal stand-ins, used only when a deployment's templates are not checked out
+FALLBACK_TEMPLATES = {
+    "index.html": "index",
+    "book.html": "book",
+    "booking_success.html": "{{ booking['id'] }} {{ booking['name'] }} {{ wa['customer_link'] }}",
+    "admin.html": "{{ bookings|length }}",
+    "admin_dashboard.html": "dashboard",
+}
+
+def install_fallback_templates(m):
+    from jinja2 import ChoiceLoader, DictLoader
+    m.app.jinja_loader  # force creation of the default loader
+    m.app.jinja_env.loader = ChoiceLoader([m.app.jinja_env.loader, DictLoader(FALLBACK_TEMPLATES)])
+
+
+# ---------------- Synthetic data ----------------
+def seed(db_path, rows, seed_value=42):
+    rnd = random.Random(seed_value)
+    db = sqlite3.connect(db_path)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        created = start + timedelta(minutes=i * 3)
+        event = created + timedelta(days=rnd.randint(7, 240))
+        batch.append((
+            f"Customer {i}",
+            rnd.choice(LOCATIONS),
+            f"9{rnd.randint(100000000, 999999999)}",
+            f"customer{i}@example.com" if i % 3 else None,
+            event.date().isoformat(),
+            rnd.choice(SERVICES),
+            "Stage Decoration, Lighting",
+            "Synthetic benchmark booking",
+            rnd.choice(STATUSES),
+            created.strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+        if len(batch) >= 10000:
+            insert_batch(db, batch)
+            batch = []
+    if batch:
+        insert_batch(db, batch)
+    db.close()
+
+def insert_batch(db, batch):
+    db.executemany(
+        """
+        INSERT INTO bookings (name, location, phone, customer_email, event_date, service, extras, notes, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        batch,
+    )
+    db.commit()
+
+
+# ---------------- Measurement ----------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+def summarize(latencies, elapsed, statuses, sizes):
+    ms = sorted(x * 1000 for x in latencies)
+    return {
+        "requests": len(ms),
+        "throughput_rps": round(len(ms) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 3) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 3) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 3) if ms else None,
+        "max_ms": round(ms[-1], 3) if ms else None,
+        "status_codes": {str(k): statuses.count(k) for k in sorted(set(statuses))},
+        "mean_bytes": round(statistics.fmean(sizes), 1) if sizes else None,
+    }
+
+def run_scenario(make_client, action, iterations, concurrency):
+    """
+    Call action(client, i) `iterations` times across `concurrency` threads.
+    action returns (status_code, body_size).
+    """
+    latencies, statuses, sizes = [], [], []
+    lock = threading.Lock()
+    counter = iter(range(iterations))
+
+    def worker():
+        client = make_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            status, size = action(client, i)
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                statuses.append(status)
+                sizes.append(size)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for f in [pool.submit(worker) for _ in range(concurrency)]:
+            f.result()
+    return summarize(latencies, time.perf_counter() - started, statuses, sizes)
+
+
+def bench_rows(m, rows, args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="jagadha-bench-"), "bookings.db")
+    m.app.config["DATABASE"] = db_path
+    m.receipt_cache.directory = m.Path(os.path.dirname(db_path)) / "receipts"
+    m.init_db()
+    t0 = time.perf_counter()
+    seed(db_path, rows)
+    seed_seconds = time.perf_counter() - t0
+
+    def admin_client():
+        client = m.app.test_client()
+        with client.session_transaction() as sess:
+            sess["admin"] = True
+        return client
+
+    def consume(resp):
+        # iterate so streamed responses are fully generated
+        size = sum(len(chunk) for chunk in resp.response)
+        resp.close()
+        return resp.status_code, size
+
+    def book(client, i):
+        return consume(client.post("/book", data={
+            "name": f"Bench {i}", "location": "Chennai", "phone": "9876543210",
+            "event_date": "2026-12-01", "service": "Wedding",
+            "extras": ["Stage Decoration"], "notes": "bench",
+        }))
+
+    def booking_page(client, i):
+        return consume(client.get(f"/booking/{(i % rows) + 1}"))
+
+    # the response cache is keyed by URL: a unique, unused `_bench` arg makes every
+    # call a miss (even across threads), so these scenarios time the query itself
+    def api_bookings(client, i):
+        return consume(client.get("/api/bookings", query_string={"_bench": i}))
+
+    def api_bookings_cached(client, i):
+        return consume(client.get("/api/bookings"))
+
+    def api_bookings_columns(client, i):
+        return consume(client.get("/api/bookings", query_string={"format": "columns", "_bench": i}))
+
+    def api_bookings_gzip(client, i):
+        return consume(client.get("/api/bookings", query_string={"format": "columns", "_bench": i},
+                                  headers={"Accept-Encoding": "gzip"}))
+
+    def api_bookings_filtered(client, i):
+        return consume(client.get("/api/bookings", query_string={
+            "status": STATUSES[i % 3], "service": SERVICES[i % len(SERVICES)], "_bench": i}))
+
+    def export(client, i):
+        return consume(client.get("/export_csv"))
+
+    def confirm(client, i):
+        return consume(client.get(f"/confirm/{(i * 7919 % rows) + 1}"))
+
+    def pdf(client, i):
+        with m.app.app_context():
+            row = m.get_db().execute("SELECT * FROM bookings WHERE id=?", ((i % rows) + 1,)).fetchone()
+            body = m.generate_pdf_receipt(row)
+        return 200, len(body)
+
+    scenarios = {
+        "book_post": (book, args.iterations),
+        "booking_page": (booking_page, args.iterations),
+        "api_bookings": (api_bookings, args.iterations),
+        "api_bookings_cached": (api_bookings_cached, args.iterations),
+        "api_bookings_columns": (api_bookings_columns, args.iterations),
+        "api_bookings_gzip": (api_bookings_gzip, args.iterations),
+        "api_bookings_filtered": (api_bookings_filtered, args.iterations),
+        "export_csv": (export, args.export_iterations),
+        "confirm_booking": (confirm, args.iterations),
+        "generate_pdf_receipt": (pdf, args.iterations),
+    }
+    results = {"seed_seconds": round(seed_seconds, 3), "scenarios": {}}
+    for name, (action, iterations) in scenarios.items():
+        if args.only and name not in args.only:
+            continue
+        results["scenarios"][name] = run_scenario(admin_client, action, iterations, args.concurrency)
+        print(f"  {name:<24} {results['scenarios'][name]}", file=sys.stderr)
+    if not args.only or "serialization" in args.only:
+        results["serialization"] = bench_serialization(m, args.iterations)
+        print(f"  {'serialization':<24} {results['serialization']}", file=sys.stderr)
+    return results
+
+def bench_serialization(m, iterations, limit=500):
+    """
+    Build one max-size /api/bookings page per format, bypassing the response cache:
+    serialization time plus raw / gzip / brotli payload sizes.
+    """
+    import zlib
+    out = {}
+    with m.app.test_request_context():
+        db = m.get_db()
+        for fmt in ("json", "columns"):
+            args = {"limit": str(limit), "format": fmt}
+            times = []
+            for _ in range(max(1, iterations // 10)):
+                t0 = time.perf_counter()
+                body = m.build_bookings_page(db, args)
+                times.append(time.perf_counter() - t0)
+            raw = body.encode("utf-8")
+            gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+            sizes = {"raw_bytes": len(raw), "gzip_bytes": len(gz.compress(raw) + gz.flush())}
+            if m.brotli_module():
+                sizes["br_bytes"] = len(m.compress_body(raw, "br"))
+            ms = sorted(x * 1000 for x in times)
+            out[fmt] = {"rows": limit, "mean_ms": round(statistics.fmean(ms), 3),
+                        "p95_ms": round(percentile(ms, 95), 3), **sizes}
+    return out
+
+
+# ---------------- Import-time budget ----------------
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 500))
+IMPORT_PROBE = (
+    "import sys, time; sys.path.insert(0, {path!r}); t = time.perf_counter(); "
+    "import app; print((time.perf_counter() - t) * 1000)"
+)
+
+def measure_import_ms(repeat=3):
+    """
+    Best-of-N wall time of `import app` in a fresh interpreter (no side effects
+    beyond module setup are expected at import).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, "-c", IMPORT_PROBE.format(path=here)], cwd=here)
+        runs.append(float(out.decode().strip().splitlines()[-1]))
+    return min(runs)
+
+def check_import_budget(budget_ms=IMPORT_BUDGET_MS):
+    took = measure_import_ms()
+    ok = took <= budget_ms
+    print(f"import app: {took:.0f} ms (budget {budget_ms:.0f} ms) {'OK' if ok else 'OVER BUDGET'}", file=sys.stderr)
+    return took, ok
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000", help="comma separated dataset sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--export-iterations", type=int, default=5, help="full exports per dataset")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads per scenario")
+    parser.add_argument("--latency-ms", type=float, default=0, help="artificial latency of each fake provider call")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--check-import-budget", action="store_true",
+                        help="only measure `import app` and exit 1 if it exceeds IMPORT_BUDGET_MS")
+    args = parser.parse_args(argv)
+
+    import_ms, import_ok = check_import_budget()
+    if args.check_import_budget:
+        sys.exit(0 if import_ok else 1)
+
+    import app as m
+
+    fakes = FakeProviders(args.latency_ms)
+    install_fakes(m, fakes)
+    install_fallback_templates(m)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "fake_latency_ms": args.latency_ms,
+            "import_ms": round(import_ms, 1),
+        },
+        "runs": {},
+    }
+    try:
+        for rows in [int(x) for x in args.rows.split(",") if x]:
+            print(f"rows={rows}", file=sys.stderr)
+            report["runs"][str(rows)] = bench_rows(m, rows, args)
+    finally:
+        m.stop_background()
+    report["meta"]["fake_calls"] = fakes.calls
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# tests/test_import_time.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench
+
+
+def test_import_app_within_budget():
+    took = bench.measure_import_ms()
+    assert took <= bench.IMPORT_BUDGET_MS, f"import app took {took:.0f} ms (budget {bench.IMPORT_BUDGET_MS:.0f} ms)"